@@ -1,11 +1,9 @@
 # importar as bibliotecas
+# Só o leve no topo: pandas e as bibliotecas de cada ferramenta são importados quando a ferramenta é aberta
+# (python -m benchmarks.inicio confere o tempo de início contra um orçamento)
 import streamlit as st
-import pandas as pd
-from PIL import Image
-import base64
-import io
 from datetime import datetime
-from streamlit_autorefresh import st_autorefresh
+from ferramentas import medicao
 
 # Configurações da página
 st.set_page_config(
@@ -15,13 +13,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Cache da imagem convertida
-@st.cache_data
-def carregar_banner_base64():
-    image = Image.open("fiscai_banner.png")
-    buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
+# Banner otimizado gerado no build (scripts/gerar_banner.py) e servido de static/ (server.enableStaticServing):
+# o navegador guarda a imagem em cache e a página não reenvia o conteúdo a cada execução
+BANNER_URL = "app/static/fiscai_banner.webp"
 
 # CSS da sidebar
 st.markdown("""
@@ -54,15 +48,64 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
+# Medição por etapa (opcional); FISCAI_MEDICAO=1 ou =memoria liga por padrão
+medir = st.sidebar.toggle("⏱️ Medir desempenho", value=bool(medicao.MEDICAO_PADRAO))
+medir_memoria = st.sidebar.checkbox(
+    "Incluir memória Python (tracemalloc, mais lento)",
+    value=medicao.MEDICAO_PADRAO == "memoria",
+    disabled=not medir,
+)
+
+
+def exibir_medicao(sessao, ferramenta):
+    # Guarda as últimas execuções medidas na sessão: um clique em download refaz a tela com a extração em cache
+    historico = st.session_state.setdefault("medicoes", [])
+    if sessao.registros:
+        historico.append(sessao.exportar(ferramenta=ferramenta))
+        del historico[:-20]
+    with st.expander("⏱️ Performance"):
+        if sessao.registros:
+            import pandas as pd
+            tabela = pd.DataFrame(sessao.resumo())
+            tabela["etapa"] = ["  " * nivel + ("└ " if nivel else "") + nome for nivel, nome in zip(tabela["nivel"], tabela["etapa"])]
+            st.dataframe(tabela.drop(columns="nivel"), hide_index=True)
+        else:
+            st.caption("Nenhuma etapa medida nesta execução.")
+        st.caption(
+            "Tempos em segundos e memória em MB. Resultados já guardados não são processados de novo; "
+            f"o JSON traz as últimas {len(historico)} execuções medidas nesta sessão."
+        )
+        st.download_button(
+            "📥 Baixar medições (JSON)",
+            data=medicao.para_json(historico),
+            file_name="medicoes_fiscai.json",
+            mime="application/json",
+        )
+
+# Só o relógio é refeito a cada 5 min (fragmento nativo, sem componente extra nem reenvio do banner)
+@st.fragment(run_every=300)
+def relogio_reforma():
+    agora = datetime.now()
+    data_reforma = datetime(2026, 1, 1)
+    tempo_restante = data_reforma - agora
+    dias = tempo_restante.days
+    horas = tempo_restante.seconds // 3600
+
+    st.markdown(f"""
+    <div class="clock-container">
+        <div class="clock-label">Contagem Regressiva para a Reforma Tributária</div>
+        <div class="clock">
+            ⏳ {dias}d : {horas:02d}h
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
 # Exibir conteúdo com base na opção escolhida
 if menu == "🏠 Início":
-    st_autorefresh(interval=300000, key="relogio_reforma")  # Atualiza a cada 5 min
-
-    img_base64 = carregar_banner_base64()
     st.markdown(
         f"""
         <div style='text-align: center; margin-bottom: 1rem;'>
-            <img src="data:image/png;base64,{img_base64}" width="900">
+            <img src="{BANNER_URL}" width="900" height="600" alt="FiscAI">
         </div>
         """,
         unsafe_allow_html=True
@@ -95,42 +138,34 @@ if menu == "🏠 Início":
     </style>
     """, unsafe_allow_html=True)
 
-    agora = datetime.now()
-    data_reforma = datetime(2026, 1, 1)
-    tempo_restante = data_reforma - agora
-    dias = tempo_restante.days
-    horas = tempo_restante.seconds // 3600
+    relogio_reforma()
 
-    st.markdown(f"""
-    <div class="clock-container">
-        <div class="clock-label">Contagem Regressiva para a Reforma Tributária</div>
-        <div class="clock">
-            ⏳ {dias}d : {horas:02d}h
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
 
+else:
+    with medicao.sessao(ativa=medir, memoria=medir_memoria) as sessao_medicao:
+        if menu == "📁 XML NF-e | Regime Tributário":
+            from ferramentas.leitor_rt import app as leitor_rt_app
+            leitor_rt_app()
 
-elif menu == "📁 XML NF-e | Regime Tributário":
-    from ferramentas.leitor_rt import app as leitor_rt_app
-    leitor_rt_app()
+        elif menu == "📁 XML NF-e | Pendências":
+            from ferramentas.xml_nfe_pendentes import app as pendentes_app
+            pendentes_app()
 
-elif menu == "📁 XML NF-e | Pendências":
-    from ferramentas.xml_nfe_pendentes import app as pendentes_app
-    pendentes_app()
+        elif menu == "📁 XML NFC-e | Conferência":
+            from ferramentas.xml_nfce import app as xml_nfce_app
+            xml_nfce_app()
 
-elif menu == "📁 XML NFC-e | Conferência":
-    from ferramentas.xml_nfce import app as xml_nfce_app
-    xml_nfce_app()
+        elif menu == "📄 Leitor PDF | Energia Elétrica":
+            from ferramentas.leitor_pdf_nf3e import app as leitor_pdf_nf3e_app
+            leitor_pdf_nf3e_app()
 
-elif menu == "📄 Leitor PDF | Energia Elétrica":
-    from ferramentas.leitor_pdf_nf3e import app as leitor_pdf_nf3e_app
-    leitor_pdf_nf3e_app()
+        elif menu == "📊 Leitor TXT | Natureza da Receita":
+            from ferramentas.resumo_nat_receita import app as resumo_app
+            resumo_app()
+        elif menu == "🔄 EXCEL - CSV | Lançamentos IRPF":
+            from ferramentas.converter_xlsx_csv import app as converter_xlsx_csv_app
+            converter_xlsx_csv_app()
 
-elif menu == "📊 Leitor TXT | Natureza da Receita":
-    from ferramentas.resumo_nat_receita import app as resumo_app
-    resumo_app()
-elif menu == "🔄 EXCEL - CSV | Lançamentos IRPF":
-    from ferramentas.converter_xlsx_csv import app as converter_xlsx_csv_app
-    converter_xlsx_csv_app()
+    if sessao_medicao:
+        exibir_medicao(sessao_medicao, menu)
 
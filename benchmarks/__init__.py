@@ -0,0 +1 @@
+# Benchmarks e corpus sintético do FiscAI (python -m benchmarks)
@@ -0,0 +1,226 @@
+"""Corpus fiscal sintético para os benchmarks das ferramentas.
+
+Gera, de forma determinística (mesma semente, mesmos arquivos):
+
+- ZIP de XMLs de NFC-e (modelo 65) com eventos de cancelamento (procEventoNFe)
+- ZIP de XMLs de NF-e (modelo 55) de vários fornecedores, com arquivos inválidos
+- ZIP de PDFs no layout padrão de NF3e (conta de energia)
+- TXT da Natureza da Receita (um item por linha)
+- XLSX da base de lançamentos do IRPF
+
+Uso: python -m benchmarks.corpus <tipo> <quantidade> <destino> [--itens N] [--semente S]
+"""
+
+import argparse
+import io
+import random
+import zipfile
+
+NS = "http://www.portalfiscal.inf.br/nfe"
+TIPOS = ("nfce", "nfe", "nf3e", "nat-receita", "irpf")
+
+
+def _det(i, rnd):
+    # Um item (det) com ICMS variando entre tributado, reduzido, isento e ST
+    vprod = round(rnd.uniform(1, 200), 2)
+    vdesc = round(rnd.choice([0, 0, vprod * 0.1]), 2)
+    cst = rnd.choice(["00", "20", "40", "60"])
+    if cst == "20":
+        icms = (f"<ICMS20><orig>0</orig><CST>20</CST><modBC>3</modBC><pRedBC>33.33</pRedBC>"
+                f"<vBC>{vprod * 0.6667:.2f}</vBC><pICMS>18.00</pICMS><vICMS>{vprod * 0.12:.2f}</vICMS></ICMS20>")
+    elif cst == "00":
+        icms = (f"<ICMS00><orig>0</orig><CST>00</CST><modBC>3</modBC><vBC>{vprod:.2f}</vBC>"
+                f"<pICMS>18.00</pICMS><vICMS>{vprod * 0.18:.2f}</vICMS></ICMS00>")
+    else:
+        icms = f"<ICMS{cst}><orig>0</orig><CST>{cst}</CST></ICMS{cst}>"
+    cprod = rnd.randint(1, 50)
+    desc = f"<vDesc>{vdesc:.2f}</vDesc>" if vdesc else ""
+    return (
+        f'<det nItem="{i + 1}"><prod><cProd>{cprod}</cProd><cEAN>SEM GTIN</cEAN><xProd>PRODUTO {cprod} DESC</xProd>'
+        f"<NCM>2202100{cprod % 10}</NCM><CFOP>{rnd.choice(['5102', '5405'])}</CFOP><uCom>UN</uCom>"
+        f"<qCom>{rnd.randint(1, 5)}.0000</qCom><vUnCom>{vprod:.2f}</vUnCom><vProd>{vprod:.2f}</vProd>"
+        f"<cEANTrib>SEM GTIN</cEANTrib><uTrib>UN</uTrib><qTrib>1.0000</qTrib><vUnTrib>{vprod:.2f}</vUnTrib>"
+        f"{desc}<indTot>1</indTot></prod><imposto><vTotTrib>1.00</vTotTrib><ICMS>{icms}</ICMS>"
+        f"<PIS><PISAliq><CST>01</CST><vBC>{vprod:.2f}</vBC><pPIS>1.65</pPIS><vPIS>{vprod * 0.0165:.2f}</vPIS></PISAliq></PIS>"
+        f"<COFINS><COFINSAliq><CST>01</CST><vBC>{vprod:.2f}</vBC><pCOFINS>7.60</pCOFINS>"
+        f"<vCOFINS>{vprod * 0.076:.2f}</vCOFINS></COFINSAliq></COFINS></imposto></det>"
+    )
+
+
+def nota(numero, serie, itens, rnd, modelo=65, cnpj="12345678000199", nome="LOJA", crt=3):
+    """Devolve (chave, xml) de uma nota autorizada (nfeProc) com `itens` itens."""
+    chave = (f"352401{cnpj}{modelo:02d}{serie:03d}{numero:09d}1"
+             f"{rnd.randint(10000000, 99999999)}{rnd.randint(0, 9)}")
+    dets = "".join(_det(i, rnd) for i in range(itens))
+    dest = ""
+    if rnd.random() < 0.3:
+        dest = f"<dest><CPF>{rnd.randint(10 ** 10, 10 ** 11 - 1)}</CPF><xNome>CONSUMIDOR</xNome></dest>"
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?><nfeProc xmlns="{NS}" versao="4.00"><NFe xmlns="{NS}">'
+        f'<infNFe Id="NFe{chave}" versao="4.00"><ide><cUF>35</cUF><cNF>{chave[35:43]}</cNF><natOp>VENDA</natOp>'
+        f"<mod>{modelo}</mod><serie>{serie}</serie><nNF>{numero}</nNF>"
+        f"<dhEmi>2024-01-{rnd.randint(1, 28):02d}T10:00:00-03:00</dhEmi><tpNF>1</tpNF></ide>"
+        f"<emit><CNPJ>{cnpj}</CNPJ><xNome>{nome}</xNome><xFant>{nome} FANTASIA</xFant>"
+        f"<enderEmit><UF>SP</UF></enderEmit><IE>1</IE><CRT>{crt}</CRT></emit>{dest}{dets}"
+        f"<total><ICMSTot><vNF>{rnd.uniform(1, 9999):.2f}</vNF></ICMSTot></total>"
+        f"<pag><detPag><tPag>{rnd.choice(['01', '03', '17'])}</tPag><vPag>1</vPag></detPag></pag></infNFe>"
+        f'<Signature xmlns="http://www.w3.org/2000/09/xmldsig#"><SignedInfo/></Signature></NFe>'
+        f'<protNFe versao="4.00"><infProt><chNFe>{chave}</chNFe><xMotivo>Autorizado o uso da NF-e</xMotivo>'
+        f"</infProt></protNFe></nfeProc>"
+    )
+    return chave, xml
+
+
+def evento_cancelamento(chave, cnpj="12345678000199"):
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><procEventoNFe xmlns="{NS}" versao="1.00"><evento versao="1.00">'
+        f'<infEvento Id="ID110111{chave}01"><cOrgao>35</cOrgao><CNPJ>{cnpj}</CNPJ><chNFe>{chave}</chNFe>'
+        f"<dhEvento>2024-01-15T12:00:00-03:00</dhEvento><tpEvento>110111</tpEvento></infEvento></evento>"
+        f"</procEventoNFe>"
+    )
+
+
+def gerar_nfce(destino, documentos, itens=3, semente=1):
+    """ZIP com `documentos` NFC-e em duas séries, ~5% de quebras de numeração e ~5% canceladas."""
+    rnd = random.Random(semente)
+    por_serie = max(1, documentos // 2)
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as z:
+        for serie in (1, 2):
+            for numero in range(1, por_serie + 1):
+                if rnd.random() < 0.05:
+                    continue
+                chave, xml = nota(numero, serie, rnd.randint(1, 2 * itens - 1), rnd)
+                z.writestr(f"nfce/{serie}/{chave}.xml", xml)
+                if rnd.random() < 0.05:
+                    z.writestr(f"nfce/{serie}/{chave}-canc.XML", evento_cancelamento(chave))
+
+
+def gerar_nfe(destino, documentos, itens=3, semente=2):
+    """ZIP com `documentos` NF-e de ~documentos/3 fornecedores (todos os CRT), mais um TXT e um XML inválido."""
+    rnd = random.Random(semente)
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as z:
+        for numero in range(1, documentos + 1):
+            f = rnd.randint(1, documentos // 3 + 1)
+            chave, xml = nota(numero, 1, rnd.randint(1, 2 * itens - 1), rnd, modelo=55,
+                              cnpj=f"{f:08d}0001{f % 100:02d}", nome=f"FORNECEDOR {f}", crt=f % 4 + 1)
+            z.writestr(f"pasta{numero % 3}/{chave}.xml", xml)
+        z.writestr("leiame.txt", "x")
+        z.writestr("quebrado.xml", "<nao")
+
+
+def pdf(paginas):
+    """PDF mínimo (Helvetica, WinAnsi) com uma lista de linhas de texto por página."""
+    objs = []
+
+    def adicionar(corpo):
+        objs.append(corpo)
+        return len(objs)
+
+    fonte = adicionar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    filhas = []
+    id_paginas = len(objs) + 1 + 2 * len(paginas)
+    for linhas in paginas:
+        ops = [b"BT /F1 10 Tf 14 TL 40 800 Td"]
+        for linha in linhas:
+            texto = linha.encode("cp1252").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+            ops.append(b"(" + texto + b") Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        conteudo = adicionar(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        filhas.append(adicionar(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (id_paginas, conteudo, fonte)
+        ))
+    adicionar(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in filhas) + b"] /Count %d >>" % len(filhas))
+    catalogo = adicionar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    saida = io.BytesIO()
+    saida.write(b"%PDF-1.4\n")
+    posicoes = []
+    for i, corpo in enumerate(objs, 1):
+        posicoes.append(saida.tell())
+        saida.write(b"%d 0 obj\n" % i + corpo + b"\nendobj\n")
+    xref = saida.tell()
+    saida.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for posicao in posicoes:
+        saida.write(b"%010d 00000 n \n" % posicao)
+    saida.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, catalogo, xref))
+    return saida.getvalue()
+
+
+def conta_energia(rnd, uc, i, paginas=2):
+    # 1ª página com o cabeçalho fiscal do layout padrão; as demais só com histórico de consumo
+    cabecalho = [
+        "DISTRIBUIDORA DE ENERGIA S.A.", "ROMA HOTEIS LTDA FILIAL VILLAS", "RUA EXEMPLO, 100",
+        f"NOTA FISCAL Nº {100000 + i} - SÉRIE 1", f"DATA DE EMISSÃO: {rnd.randint(1, 28):02d}/01/2024",
+        "CNPJ/CPF: 12.345.678/0001-99", f"Protocolo de autorização: 3524{rnd.randint(10 ** 10, 10 ** 11)} - 05/01/2024 10:00",
+        "JAN/2024", f"{uc}", f"R$*****{rnd.randint(10, 999)},{rnd.randint(0, 99):02d}",
+        f"chave de acesso: 3524{rnd.randint(10 ** 19, 10 ** 20 - 1)}{rnd.randint(10 ** 19, 10 ** 20 - 1)}",
+    ]
+    historico = [[f"Histórico de consumo linha {j}" for j in range(40)] for _ in range(paginas - 1)]
+    return pdf([cabecalho] + historico)
+
+
+def gerar_nf3e(destino, documentos, itens=2, semente=3):
+    """ZIP com `documentos` contas em PDF de `itens` páginas; 1 em 7 tem a UC do nome divergente."""
+    rnd = random.Random(semente)
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(documentos):
+            uc = rnd.randint(10 ** 9, 10 ** 10 - 1)
+            nome = uc if i % 7 else uc + 1
+            z.writestr(f"contas/{'sub/' if i % 2 else ''}{nome}.pdf", conta_energia(rnd, uc, i, max(1, itens)))
+
+
+def gerar_nat_receita(destino, documentos, itens=10, semente=4):
+    """TXT com `documentos` × `itens` linhas de itens; ~0,1% com Valor_Total inválido."""
+    rnd = random.Random(semente)
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        for i in range(documentos * itens):
+            reais, centavos = rnd.randint(0, 99999), rnd.randint(0, 99)
+            valor = "R$ abc" if rnd.random() < 0.001 else f"R$ {reais:,}".replace(",", ".") + f",{centavos:02d}"
+            campos = [
+                i // itens, f"Prod {i}", i % 500, rnd.choice([101, 201, 301, 403, 999, 1000]), "x",
+                f"{rnd.randint(1, 97):02d}{rnd.randint(0, 999999):06d}", rnd.choice([1, 6, 50, 73]),
+                rnd.choice([1, 6, 50, 73]), rnd.choice([5102, 5405, 6102]), 1, 0, 0, valor,
+            ]
+            f.write(",".join(f'"{campo}"' for campo in campos) + "\n")
+
+
+def gerar_irpf(destino, documentos, itens=1, semente=5):
+    """XLSX da base de lançamentos do IRPF com `documentos` × `itens` linhas."""
+    import datetime
+    import openpyxl
+
+    rnd = random.Random(semente)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Base")
+    ws.append(["cpf_cnpj", "fonte_pagadora", "subconta", "rendimento", "data"])
+    for i in range(documentos * itens):
+        rendimento = round(rnd.random() * 1e5, 2) if i % 7 else f"{rnd.randrange(1000)},{rnd.randrange(100):02d}"
+        ws.append([f"{rnd.randrange(10 ** 11):011d}", f"Fonte {i % 1000}", rnd.randrange(1, 50), rendimento,
+                   datetime.datetime(2024, 1, 1 + i % 28)])
+    wb.save(destino)
+
+
+GERADORES = {
+    "nfce": gerar_nfce, "nfe": gerar_nfe, "nf3e": gerar_nf3e,
+    "nat-receita": gerar_nat_receita, "irpf": gerar_irpf,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.corpus", description="Gera um corpus fiscal sintético.")
+    parser.add_argument("tipo", choices=TIPOS)
+    parser.add_argument("quantidade", type=int, help="número de documentos")
+    parser.add_argument("destino", help="arquivo de saída (.zip, .txt ou .xlsx)")
+    parser.add_argument("--itens", type=int, default=None,
+                        help="densidade: itens médios por nota, páginas por PDF ou linhas por documento")
+    parser.add_argument("--semente", type=int, default=None)
+    args = parser.parse_args(argv)
+    opcoes = {k: v for k, v in (("itens", args.itens), ("semente", args.semente)) if v is not None}
+    GERADORES[args.tipo](args.destino, args.quantidade, **opcoes)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
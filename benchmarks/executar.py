@@ -0,0 +1,204 @@
+"""Micro-benchmarks das ferramentas, sem Streamlit.
+
+Para cada ferramenta e escala (número de documentos), gera o corpus
+sintético (uma vez, em --corpus) e mede em um processo separado o tempo
+de cada etapa (extrair, agregar, exportar), a vazão em documentos/s e o
+pico de memória (RSS) do processo. O cache de extração fica desligado.
+
+Uso:
+    python -m benchmarks [--ferramentas nfce,rt] [--escalas 1000,10000,100000]
+                         [--salvar base.json] [--comparar base.json] [--tolerancia 0.2]
+
+Com --comparar, cada medida é confrontada com a base gravada antes por
+--salvar; piora acima da tolerância (20% por padrão) em tempo ou memória
+é listada e o comando termina com código 1.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus
+from ferramentas.medicao import pico_rss_mb
+
+# Ferramenta → (gerador do corpus, extensão do arquivo de entrada)
+CORPUS = {
+    "nfce": ("nfce", ".zip"),
+    "rt": ("nfe", ".zip"),
+    "pendentes": ("nfe", ".zip"),
+    "nf3e": ("nf3e", ".zip"),
+    "nat-receita": ("nat-receita", ".txt"),
+    "xlsx-csv": ("irpf", ".xlsx"),
+}
+ESCALAS = (1_000, 10_000, 100_000)
+
+
+def _medir(etapas, nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    etapas[nome] = time.perf_counter() - inicio
+    return resultado
+
+
+def rodar_nfce(entrada, saida, workers, etapas):
+    from ferramentas.fonte_zip import iterar_membros
+    from ferramentas.nucleo import nfce
+
+    dados = _medir(etapas, "extrair", lambda: nfce.carregar(iterar_membros(entrada, (".xml",)), None, workers))
+    with dados[1]:
+        abas = _medir(etapas, "agregar", lambda: nfce.montar_abas(*dados))
+        _medir(etapas, "exportar", lambda: nfce.gerar_planilha(abas, saida))
+
+
+def rodar_rt(entrada, saida, workers, etapas):
+    from ferramentas.fonte_zip import iterar_membros
+    from ferramentas.nucleo import regime
+
+    df, total = _medir(etapas, "extrair", lambda: regime.carregar(iterar_membros(entrada, (".xml",)), None, workers))
+    unicos = _medir(etapas, "agregar", lambda: df.drop_duplicates())
+    _medir(etapas, "exportar", lambda: regime.gerar_excel_formatado(unicos, saida, total, len(df) - len(unicos), len(unicos)))
+
+
+def rodar_pendentes(entrada, saida, workers, etapas):
+    from ferramentas.fonte_zip import iterar_membros
+    from ferramentas.nucleo import pendentes
+
+    df, _ = _medir(etapas, "extrair", lambda: pendentes.carregar(iterar_membros(entrada, (".xml",)), None, workers))
+    df = _medir(etapas, "agregar", lambda: pendentes.preparar(df))
+    _medir(etapas, "exportar", lambda: pendentes.gerar_excel(df, saida))
+
+
+def rodar_nf3e(entrada, saida, workers, etapas):
+    from ferramentas.fonte_zip import iterar_membros
+    from ferramentas.nucleo import nf3e
+
+    df, _ = _medir(etapas, "extrair", lambda: nf3e.carregar(iterar_membros(entrada, (".pdf",)), None, workers))
+    _medir(etapas, "exportar", lambda: nf3e.gerar_planilha(df, saida))
+
+
+def rodar_nat_receita(entrada, saida, workers, etapas):
+    from ferramentas.nucleo import nat_receita
+
+    totais, _ = _medir(etapas, "extrair", lambda: nat_receita.agregar_txt(entrada))
+    resumo = _medir(etapas, "agregar", lambda: nat_receita.resumir(
+        nat_receita.filtrar(nat_receita.combinar_totais([totais]), {"CST_PIS": ["50"]})))
+    _medir(etapas, "exportar", lambda: nat_receita.gerar_excel(resumo, saida))
+
+
+def rodar_xlsx_csv(entrada, saida, workers, etapas):
+    from ferramentas.nucleo.xlsx_csv import converter_planilha
+
+    with open(saida, "wb") as f:
+        _medir(etapas, "converter", lambda: converter_planilha(entrada, f))
+
+
+RODADAS = {
+    "nfce": rodar_nfce, "rt": rodar_rt, "pendentes": rodar_pendentes,
+    "nf3e": rodar_nf3e, "nat-receita": rodar_nat_receita, "xlsx-csv": rodar_xlsx_csv,
+}
+
+
+def rodada(ferramenta, entrada, workers):
+    """Roda uma ferramenta sobre `entrada` no processo atual e imprime as medidas em JSON."""
+    etapas = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        saida = os.path.join(pasta, "saida.csv" if ferramenta == "xlsx-csv" else "saida.xlsx")
+        RODADAS[ferramenta](entrada, saida, workers, etapas)
+    print(json.dumps({"etapas": etapas, "pico_mb": pico_rss_mb()}))
+
+
+def preparar_corpus(ferramenta, documentos, pasta, itens=None):
+    tipo, extensao = CORPUS[ferramenta]
+    caminho = os.path.join(pasta, f"{tipo}-{documentos}-{itens or 'padrao'}{extensao}")
+    if not os.path.exists(caminho):
+        opcoes = {"itens": itens} if itens else {}
+        temporario = caminho + ".parcial"
+        corpus.GERADORES[tipo](temporario, documentos, **opcoes)
+        os.replace(temporario, caminho)
+    return caminho
+
+
+def medir(ferramenta, documentos, pasta, workers=None, itens=None):
+    """Mede uma ferramenta em uma escala, em um processo novo (o pico de memória é só dele)."""
+    entrada = preparar_corpus(ferramenta, documentos, pasta, itens)
+    comando = [sys.executable, "-m", "benchmarks.executar", "--rodada", ferramenta, entrada]
+    if workers:
+        comando += ["--workers", str(workers)]
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    saida = subprocess.run(comando, cwd=raiz, check=True, capture_output=True, text=True).stdout
+    medidas = json.loads(saida.strip().splitlines()[-1])
+    total = sum(medidas["etapas"].values())
+    medidas.update(documentos=documentos, total=total, docs_por_s=round(documentos / total, 1) if total else None)
+    return medidas
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista as medidas que pioraram além de `tolerancia` em relação à `base`."""
+    pioras = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if not anterior:
+            continue
+        for medida in ("total", "pico_mb"):
+            antes, agora = anterior.get(medida), atual.get(medida)
+            if antes and agora and agora > antes * (1 + tolerancia):
+                pioras.append(f"{chave} {medida}: {antes:.2f} → {agora:.2f} (+{(agora / antes - 1) * 100:.0f}%)")
+    return pioras
+
+
+def imprimir(chave, medidas, base=None):
+    etapas = "  ".join(f"{nome} {segundos:.2f}s" for nome, segundos in medidas["etapas"].items())
+    linha = f"{chave:<22} {etapas:<48} {medidas['docs_por_s'] or 0:>10.1f} docs/s  pico {medidas['pico_mb']} MB"
+    anterior = (base or {}).get(chave)
+    if anterior and anterior.get("total"):
+        linha += f"  ({(medidas['total'] / anterior['total'] - 1) * 100:+.0f}% tempo)"
+    print(linha, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks das ferramentas do FiscAI.")
+    parser.add_argument("--rodada", nargs=2, metavar=("FERRAMENTA", "ENTRADA"), help=argparse.SUPPRESS)
+    parser.add_argument("--ferramentas", default=",".join(RODADAS), help="lista separada por vírgulas")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS)), help="números de documentos, separados por vírgulas")
+    parser.add_argument("--itens", type=int, default=None, help="itens por nota / páginas por PDF / linhas por documento")
+    parser.add_argument("--workers", type=int, default=None, help="processos de extração (padrão: FISCAI_WORKERS ou CPUs)")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "fiscai-bench"),
+                        help="pasta onde o corpus sintético é gerado e reaproveitado")
+    parser.add_argument("--salvar", help="grava os resultados em JSON (nova base)")
+    parser.add_argument("--comparar", help="base JSON para comparação")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora aceita antes de falhar (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.rodada:
+        rodada(args.rodada[0], args.rodada[1], args.workers)
+        return 0
+
+    os.makedirs(args.corpus, exist_ok=True)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+    resultados = {}
+    for ferramenta in args.ferramentas.split(","):
+        for documentos in map(int, args.escalas.split(",")):
+            chave = f"{ferramenta}/{documentos}"
+            resultados[chave] = medir(ferramenta, documentos, args.corpus, args.workers, args.itens)
+            imprimir(chave, resultados[chave], base)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if base is not None:
+        pioras = comparar(resultados, base, args.tolerancia)
+        for piora in pioras:
+            print(f"Piora: {piora}")
+        return 1 if pioras else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
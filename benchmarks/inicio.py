@@ -0,0 +1,91 @@
+"""Tempo de início a frio do app, com orçamento.
+
+Cada medida roda em um interpretador novo (sem módulos em memória):
+
+- streamlit: o `import streamlit` do servidor, só informativo;
+- início: a execução do app.py na página inicial (modo "bare" do
+  Streamlit, sem servidor), que é o que o primeiro acesso espera;
+- cada ferramenta: o import do módulo da tela, feito quando ela é aberta.
+
+A página inicial não pode carregar as bibliotecas pesadas (pandas, PIL,
+openpyxl...). Vale a menor de `--repeticoes` medidas; acima do orçamento,
+ou com biblioteca pesada no início, o comando lista o estouro e termina
+com código 1.
+
+Uso: python -m benchmarks.inicio [--orcamento 0.5] [--orcamento-ferramenta 3] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ("pandas", "numpy", "pyarrow", "PIL", "openpyxl", "xlsxwriter", "pdfplumber", "lxml")
+FERRAMENTAS = (
+    "leitor_rt", "xml_nfe_pendentes", "xml_nfce", "leitor_pdf_nf3e", "resumo_nat_receita", "converter_xlsx_csv",
+)
+
+# Executado no processo novo: importa o Streamlit e mede o alvo (app.py ou um módulo de ferramenta)
+_MEDIR = """
+import importlib, json, logging, runpy, sys, time
+inicio = time.perf_counter()
+import streamlit
+logging.disable(logging.WARNING)
+meio = time.perf_counter()
+alvo = sys.argv[1]
+if alvo == "app.py":
+    runpy.run_path(alvo, run_name="__main__")
+else:
+    importlib.import_module(alvo)
+fim = time.perf_counter()
+print(json.dumps({"streamlit": meio - inicio, "alvo": fim - meio,
+                  "pesados": sorted(m for m in sys.argv[2].split(",") if m in sys.modules)}))
+"""
+
+
+def medir(alvo, repeticoes):
+    """Menor tempo (s) de `alvo` em `repeticoes` processos novos, com o import do Streamlit e os módulos pesados."""
+    melhores = None
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _MEDIR, alvo, ",".join(PESADOS)],
+            cwd=RAIZ, check=True, capture_output=True, text=True,
+        ).stdout
+        medida = json.loads(saida.strip().splitlines()[-1])
+        if melhores is None or medida["alvo"] < melhores["alvo"]:
+            melhores = medida
+    return melhores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.inicio", description="Tempo de início a frio do FiscAI.")
+    parser.add_argument("--orcamento", type=float, default=0.5, help="segundos para a página inicial (padrão 0.5)")
+    parser.add_argument("--orcamento-ferramenta", type=float, default=3.0,
+                        help="segundos para importar cada ferramenta (padrão 3)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="processos por medida; vale o menor tempo")
+    args = parser.parse_args(argv)
+
+    estouros = []
+    inicio = medir("app.py", args.repeticoes)
+    print(f"{'streamlit':<32} {inicio['streamlit']:>7.3f}s")
+    print(f"{'início (app.py)':<32} {inicio['alvo']:>7.3f}s  pesados: {', '.join(inicio['pesados']) or '—'}", flush=True)
+    if inicio["alvo"] > args.orcamento:
+        estouros.append(f"início: {inicio['alvo']:.3f}s > {args.orcamento:.3f}s")
+    if inicio["pesados"]:
+        estouros.append(f"início carrega {', '.join(inicio['pesados'])}")
+
+    for ferramenta in FERRAMENTAS:
+        medida = medir(f"ferramentas.{ferramenta}", args.repeticoes)
+        print(f"{ferramenta:<32} {medida['alvo']:>7.3f}s", flush=True)
+        if medida["alvo"] > args.orcamento_ferramenta:
+            estouros.append(f"{ferramenta}: {medida['alvo']:.3f}s > {args.orcamento_ferramenta:.3f}s")
+
+    for estouro in estouros:
+        print(f"Estouro: {estouro}")
+    return 1 if estouros else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from ferramentas.cli import main
+
+sys.exit(main())
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from functools import partial
+
+from ferramentas.paralelo import lotes, mapear_em_lotes, TAMANHO_LOTE
+
+# Cache em disco dos registros já extraídos, endereçado pelo conteúdo de cada arquivo.
+# FISCAI_CACHE=0 desliga o cache; FISCAI_CACHE_MB limita o tamanho total (LRU).
+CACHE_ATIVO = os.environ.get("FISCAI_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get("FISCAI_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "fiscai")
+LIMITE_BYTES = int(os.environ.get("FISCAI_CACHE_MB", "256")) * 1024 * 1024
+
+# Limite conservador de parâmetros por consulta no SQLite
+_MAX_PARAMETROS = 500
+
+
+class CacheExtracao:
+    """Registros extraídos por (extrator, versão, sha256 do conteúdo) em SQLite.
+
+    Cada ferramenta usa o nome da sua função de extração e uma versão; ao
+    mudar o que a função devolve, basta incrementar a versão para que os
+    registros antigos deixem de ser usados (e saiam pelo LRU). `acertos` e
+    `falhas` contam os arquivos reaproveitados e os processados nesta execução.
+    """
+
+    def __init__(self, extrator, versao, caminho=None, limite_bytes=None):
+        self.extrator = f"{extrator}:{versao}"
+        self.limite_bytes = LIMITE_BYTES if limite_bytes is None else limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        if caminho is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            caminho = os.path.join(CACHE_DIR, "extracoes.sqlite")
+        self._con = sqlite3.connect(caminho, timeout=30)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS extracoes (
+                extrator TEXT NOT NULL,
+                chave BLOB NOT NULL,
+                valor BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                acesso REAL NOT NULL,
+                PRIMARY KEY (extrator, chave)
+            )""")
+        self._con.execute("CREATE INDEX IF NOT EXISTS extracoes_acesso ON extracoes (acesso)")
+        self._con.commit()
+
+    def buscar(self, chaves):
+        """Devolve {chave: registro} para as chaves presentes e renova o acesso delas."""
+        encontrados = {}
+        for i in range(0, len(chaves), _MAX_PARAMETROS):
+            parte = chaves[i:i + _MAX_PARAMETROS]
+            marcadores = ",".join("?" * len(parte))
+            cursor = self._con.execute(
+                f"SELECT chave, valor FROM extracoes WHERE extrator = ? AND chave IN ({marcadores})",
+                [self.extrator, *parte],
+            )
+            encontrados.update((chave, pickle.loads(valor)) for chave, valor in cursor)
+        if encontrados:
+            agora = time.time()
+            self._con.executemany(
+                "UPDATE extracoes SET acesso = ? WHERE extrator = ? AND chave = ?",
+                [(agora, self.extrator, chave) for chave in encontrados],
+            )
+            self._con.commit()
+        return encontrados
+
+    def gravar(self, registros):
+        """Grava {chave: registro} em uma única transação."""
+        if not registros:
+            return
+        agora = time.time()
+        linhas = []
+        for chave, registro in registros.items():
+            valor = pickle.dumps(registro, protocol=pickle.HIGHEST_PROTOCOL)
+            linhas.append((self.extrator, chave, valor, len(valor), agora))
+        self._con.executemany("INSERT OR REPLACE INTO extracoes VALUES (?, ?, ?, ?, ?)", linhas)
+        self._con.commit()
+
+    def podar(self):
+        """Remove os registros menos usados até o total caber em `limite_bytes`."""
+        self._con.execute("""
+            DELETE FROM extracoes WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(tamanho) OVER (ORDER BY acesso DESC, rowid DESC) AS acumulado
+                    FROM extracoes
+                ) WHERE acumulado > ?
+            )""", (self.limite_bytes,))
+        self._con.commit()
+
+    def fechar(self):
+        self._con.close()
+
+    def resumo(self):
+        total = self.acertos + self.falhas
+        return f"🗃️ Cache: {self.acertos} de {total} arquivos reaproveitados, {self.falhas} processados."
+
+
+def abrir_cache(extrator, versao):
+    # Sem cache (desligado ou disco indisponível) as ferramentas seguem processando tudo
+    if not CACHE_ATIVO:
+        return None
+    try:
+        return CacheExtracao(extrator, versao)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def _extrair_lote(extrair, lote):
+    # Só os membros sem registro em cache chegam com conteúdo
+    return [registro if conteudo is None else extrair(conteudo) for conteudo, registro in lote]
+
+
+def _marcar(membros, cache, destino, tamanho_lote):
+    # Consulta o cache lote a lote; `destino` guarda (nome, chave, em_cache) na ordem de envio
+    for lote in lotes(membros, tamanho_lote):
+        chaves = [hashlib.sha256(conteudo).digest() for _, conteudo in lote]
+        encontrados = cache.buscar(chaves) if cache else {}
+        for (nome, conteudo), chave in zip(lote, chaves):
+            em_cache = chave in encontrados
+            destino.append((nome, chave, em_cache))
+            yield (None, encontrados[chave]) if em_cache else (conteudo, None)
+
+
+def extrair_membros(extrair, membros, cache=None, workers=None, tamanho_lote=None):
+    """Aplica `extrair(conteudo)` a cada (nome, conteudo) de `membros`.
+
+    Devolve, lote a lote e na ordem original, listas de (nome, registro).
+    Com `cache`, arquivos já vistos não são reprocessados e os novos
+    registros são gravados ao fim de cada lote; o LRU é aplicado ao final.
+    `extrair` precisa ser definida no nível do módulo.
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    pendentes = []
+    marcados = _marcar(membros, cache, pendentes, tamanho_lote)
+    for registros in mapear_em_lotes(partial(_extrair_lote, extrair), marcados, workers, tamanho_lote):
+        lote = pendentes[:len(registros)]
+        del pendentes[:len(registros)]
+        novos = {chave: registro for (_, chave, em_cache), registro in zip(lote, registros) if not em_cache}
+        if cache:
+            cache.acertos += len(lote) - len(novos)
+            cache.falhas += len(novos)
+            cache.gravar(novos)
+        yield [(nome, registro) for (nome, _, _), registro in zip(lote, registros)]
+    if cache:
+        cache.podar()
@@ -0,0 +1,274 @@
+"""Linha de comando do FiscAI, para rodar as ferramentas em lote (cron, servidor).
+
+Uso: python -m ferramentas <ferramenta> ENTRADAS... [-o SAIDA] [--format xlsx|csv|csv.gz|parquet] [--workers N]
+     [--medir [JSON]]
+
+As entradas podem ser arquivos soltos, ZIPs ou pastas (percorridas
+recursivamente). Não importa o Streamlit; cada ferramenta carrega só o
+próprio núcleo em ferramentas/nucleo.
+"""
+
+import argparse
+import os
+import sys
+from io import BytesIO
+
+from ferramentas import medicao
+from ferramentas.cache_extracao import abrir_cache
+from ferramentas.fonte_zip import iterar_caminhos
+
+
+def avisar(mensagem):
+    print(mensagem, file=sys.stderr)
+
+
+def _saida(args, padrao):
+    # Sem -o, usa o mesmo nome do download da tela, com a extensão do formato escolhido
+    if args.saida:
+        return args.saida
+    return os.path.splitext(padrao)[0] + "." + args.format
+
+
+def gravar(abas, saida, formato, gerar_xlsx):
+    """Grava as `abas` em `saida` no formato de --format.
+
+    Em xlsx, `gerar_xlsx(abas, saida)` grava a planilha da ferramenta. Em
+    csv, csv.gz e parquet (ver ferramentas.exportar), uma aba vai para
+    `saida` e várias viram `<saida>_<aba><extensão>`; abas em blocos
+    (TabelaEmBlocos) são gravadas um bloco por vez.
+    """
+    from ferramentas import exportar
+
+    if formato == "xlsx":
+        gerar_xlsx(abas, saida)
+        avisar(f"Gravado: {saida}")
+        return
+    base = exportar.sem_extensao(saida, formato)
+    for nome, df in abas.items():
+        caminho = saida if len(abas) == 1 else f"{base}_{nome.replace(' ', '_')}{exportar.FORMATOS[formato]['extensao']}"
+        exportar.gravar_tabela(df, formato, caminho)
+        avisar(f"Gravado: {caminho}")
+
+
+def _abrir_cache(args, extrator, versao):
+    return None if args.sem_cache else abrir_cache(extrator, versao)
+
+
+def _fechar_cache(cache):
+    if cache:
+        avisar(cache.resumo())
+        cache.fechar()
+
+
+def executar_nfce(args):
+    from ferramentas.nucleo import nfce
+
+    cache = _abrir_cache(args, nfce.EXTRATOR, nfce.VERSAO_EXTRATOR)
+    try:
+        df_dados, df_itens, df_status = nfce.carregar(iterar_caminhos(args.entradas, (".xml",)), cache, args.workers)
+    finally:
+        _fechar_cache(cache)
+    avisar(f"{len(df_status)} XMLs lidos, {len(df_dados)} documentos.")
+
+    # Os itens podem estar em blocos no disco (FISCAI_MEMORIA_MB); o with apaga os temporários
+    with df_itens:
+        abas = nfce.montar_abas(df_dados, df_itens, df_status)
+        gravar(abas, _saida(args, "Dados NFC-e.xlsx"), args.format, nfce.gerar_planilha)
+    return 0
+
+
+def executar_rt(args):
+    from ferramentas.nucleo import regime
+
+    cache = _abrir_cache(args, regime.EXTRATOR, regime.VERSAO_EXTRATOR)
+    try:
+        df, total_lidos = regime.carregar(iterar_caminhos(args.entradas, (".xml",)), cache, args.workers)
+    finally:
+        _fechar_cache(cache)
+
+    total_antes = len(df)
+    df = df.drop_duplicates()
+    removidos = total_antes - len(df)
+    avisar(f"{total_lidos} XMLs lidos, {removidos} duplicidades removidas, {len(df)} após exclusão.")
+    if df.empty:
+        avisar("Nenhum dado foi extraído. Verifique se os arquivos XML estão no padrão correto.")
+        return 1
+
+    gravar({"Regime_Tributário": regime.formatar_saida(df)}, _saida(args, "Regime_Tributario.xlsx"), args.format,
+           lambda abas, saida: regime.gerar_excel_formatado(df, saida, total_lidos, removidos, len(df)))
+    return 0
+
+
+def executar_pendentes(args):
+    from ferramentas.nucleo import pendentes
+
+    cache = _abrir_cache(args, pendentes.EXTRATOR, pendentes.VERSAO_EXTRATOR)
+    try:
+        df, total_xml = pendentes.carregar(iterar_caminhos(args.entradas, (".xml",)), cache, args.workers)
+    finally:
+        _fechar_cache(cache)
+    avisar(f"{total_xml} arquivos XML encontrados, {len(df)} extraídos.")
+    if df.empty:
+        avisar("Nenhum dado foi extraído. Verifique os arquivos XML.")
+        return 1
+
+    df = pendentes.preparar(df)
+    gravar({"Notas_Fiscais": df}, _saida(args, "dados_extraidos_nfe.xlsx"), args.format,
+           lambda abas, saida: pendentes.gerar_excel(df, saida))
+    return 0
+
+
+def executar_nf3e(args):
+    from ferramentas.nucleo import nf3e
+
+    cache = _abrir_cache(args, nf3e.EXTRATOR, nf3e.VERSAO_EXTRATOR)
+    try:
+        df, df_faltantes = nf3e.carregar(iterar_caminhos(args.entradas, (".pdf",)), cache, args.workers, avisar)
+    finally:
+        _fechar_cache(cache)
+    avisar(f"{len(df)} PDFs lidos.")
+    for arquivo, layout, campos in df_faltantes.itertuples(index=False):
+        avisar(f"Campos não encontrados em {arquivo} (layout {layout}): {campos}")
+
+    gravar({"Notas Fiscais": df}, _saida(args, "dados_nfe3.xlsx"), args.format,
+           lambda abas, saida: nf3e.gerar_planilha(df, saida))
+    return 0
+
+
+def _arquivos(entradas, extensoes):
+    # Arquivos soltos são lidos direto do disco, em blocos; ZIPs e pastas passam por iterar_caminhos
+    for entrada in entradas:
+        if os.path.isfile(entrada) and entrada.lower().endswith(extensoes):
+            yield entrada, entrada
+        else:
+            for nome, conteudo in iterar_caminhos([entrada], extensoes):
+                yield nome, BytesIO(conteudo)
+
+
+def executar_nat_receita(args):
+    from ferramentas.nucleo import nat_receita
+
+    totais = []
+    invalidas = 0
+    for nome, arquivo in _arquivos(args.entradas, (".txt", ".html")):
+        try:
+            total_arquivo, invalidas_arquivo = nat_receita.agregar_txt(arquivo)
+        except Exception as e:
+            avisar(f"Erro ao processar {nome}: {e}")
+            continue
+        totais.append(total_arquivo)
+        invalidas += invalidas_arquivo
+    if not totais:
+        avisar("Nenhum arquivo .txt válido.")
+        return 1
+
+    df = nat_receita.combinar_totais(totais)
+    if invalidas:
+        avisar(f"{invalidas} linha(s) sem Valor_Total válido foram desconsideradas.")
+    avisar(f"Valor total geral (sem filtros): R$ {nat_receita.total_reais(df):,.2f}")
+    filtros = {"CST_PIS": args.cst_pis, "CST_COFINS": args.cst_cofins, "CFOP": args.cfop, "Prefixo_NCM": args.ncm}
+    df_filtrado = nat_receita.filtrar(df, filtros)
+    avisar(f"Total após filtro: R$ {nat_receita.total_reais(df_filtrado):,.2f}")
+
+    resumo = nat_receita.resumir(df_filtrado)
+    gravar({"Resumo": resumo}, _saida(args, "resumo_nat_receita.xlsx"), args.format,
+           lambda abas, saida: nat_receita.gerar_excel(resumo, saida))
+    return 0
+
+
+def _saida_csv(pasta, nome, usados):
+    # <pasta>/<planilha>.csv; nomes repetidos (mesma planilha em pastas ou ZIPs diferentes) ganham _2, _3...
+    base = os.path.splitext(os.path.basename(nome))[0]
+    caminho = os.path.join(pasta, base + ".csv")
+    repeticao = 1
+    while caminho in usados:
+        repeticao += 1
+        caminho = os.path.join(pasta, f"{base}_{repeticao}.csv")
+    usados.add(caminho)
+    return caminho
+
+
+def executar_xlsx_csv(args):
+    """Converte cada planilha das entradas (arquivos, ZIPs ou pastas) em CSV.
+
+    Uma única planilha vai para -o (padrão convertido.csv); com pastas, ZIPs
+    ou várias entradas, cada planilha vira `<nome>.csv` na pasta de -o
+    (padrão: a pasta atual).
+    """
+    from ferramentas.nucleo.xlsx_csv import converter_planilha
+
+    unica = len(args.entradas) == 1 and os.path.isfile(args.entradas[0]) \
+        and args.entradas[0].lower().endswith(".xlsx")
+    pasta = args.saida or "."
+    if not unica:
+        os.makedirs(pasta, exist_ok=True)
+    usados = set()
+    convertidas = 0
+    for nome, arquivo in _arquivos(args.entradas, (".xlsx",)):
+        saida = (args.saida or "convertido.csv") if unica else _saida_csv(pasta, nome, usados)
+        with open(saida, "wb") as f:
+            linhas = converter_planilha(arquivo, f)
+        avisar(f"Gravado: {saida} ({linhas} linhas)")
+        convertidas += 1
+    if not convertidas:
+        avisar("Nenhuma planilha .xlsx encontrada nas entradas.")
+        return 1
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m ferramentas",
+        description="Ferramentas do FiscAI em lote, sem a interface do Streamlit.",
+    )
+    sub = parser.add_subparsers(dest="ferramenta", required=True, metavar="ferramenta")
+
+    def comando(nome, funcao, ajuda, entradas="ZIPs, arquivos ou pastas", formatos=("xlsx", "csv", "csv.gz", "parquet"),
+                saida="arquivo de saída (padrão: o mesmo nome do download na tela)", extracao=True):
+        # `extracao`: a ferramenta usa o pool de processos e o cache de extração
+        p = sub.add_parser(nome, help=ajuda, description=ajuda)
+        p.add_argument("entradas", nargs="+", help=entradas)
+        p.add_argument("-o", "--saida", help=saida)
+        p.add_argument("--format", choices=formatos, default=formatos[0],
+                       help="formato da saída; fora do xlsx, relatórios com várias abas geram um arquivo por aba")
+        if extracao:
+            p.add_argument("--workers", type=int, default=None,
+                           help="processos de extração (padrão: FISCAI_WORKERS ou o número de CPUs)")
+            p.add_argument("--sem-cache", action="store_true", help="não usa o cache de extração em disco")
+        p.add_argument("--medir", nargs="?", const="-", metavar="JSON",
+                       help="mede tempo e memória por etapa e imprime no stderr; com JSON, grava também o arquivo "
+                            "(FISCAI_MEDICAO=1 liga por padrão, =memoria inclui o tracemalloc)")
+        p.set_defaults(executar=funcao)
+        return p
+
+    comando("nfce", executar_nfce, "XML NFC-e | Conferência")
+    comando("rt", executar_rt, "XML NF-e | Regime Tributário")
+    comando("pendentes", executar_pendentes, "XML NF-e | Pendências")
+    comando("nf3e", executar_nf3e, "Leitor PDF | NF3e - Energia Elétrica (PDFs, ZIPs ou pastas)")
+    nat = comando("nat-receita", executar_nat_receita, "Leitor TXT | Natureza da Receita",
+                  entradas="arquivos .txt, ZIPs ou pastas", extracao=False)
+    nat.add_argument("--cst-pis", action="append", default=[],
+                     help="CST_PIS a considerar (pode repetir; sem filtro usa o total geral)")
+    nat.add_argument("--cst-cofins", action="append", default=[], help="CST_COFINS a considerar (pode repetir)")
+    nat.add_argument("--cfop", action="append", default=[], help="CFOP a considerar (pode repetir)")
+    nat.add_argument("--ncm", action="append", default=[], help="capítulo do NCM (2 dígitos) a considerar (pode repetir)")
+    comando("xlsx-csv", executar_xlsx_csv, "EXCEL - CSV | Lançamentos IRPF",
+            entradas="planilhas .xlsx, ZIPs ou pastas", formatos=("csv",),
+            saida="CSV de saída (padrão: convertido.csv); com várias planilhas, a pasta dos CSVs (padrão: a atual)",
+            extracao=False)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    medir = args.medir or (medicao.MEDICAO_PADRAO and "-")
+    with medicao.sessao(ativa=bool(medir), memoria=medicao.MEDICAO_PADRAO == "memoria") as sessao:
+        codigo = args.executar(args)
+    if sessao:
+        for linha in sessao.linhas():
+            avisar(linha)
+        if medir != "-":
+            with open(medir, "w", encoding="utf-8") as f:
+                f.write(medicao.para_json(sessao.exportar(ferramenta=args.ferramenta)))
+            avisar(f"Medições gravadas: {medir}")
+    return codigo
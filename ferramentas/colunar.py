@@ -0,0 +1,224 @@
+import os
+import shutil
+import tempfile
+import weakref
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+from ferramentas.moeda import centavos
+
+# Teto (MB) dos blocos tipados que um AcumuladorColunar com `limite_mb` mantém
+# em memória; acima dele os blocos vão para arquivos Parquet temporários
+LIMITE_MEMORIA_MB = int(os.environ.get("FISCAI_MEMORIA_MB", "512"))
+
+# Tipos aceitos no schema de um AcumuladorColunar
+TEXTO = "texto"
+CATEGORIA = "categoria"
+INTEIRO = "inteiro"
+DECIMAL = "decimal"
+DECIMAL_BR = "decimal_br"
+# Valores monetários: Int64 em centavos (ver ferramentas.moeda)
+CENTAVOS = "centavos"
+CENTAVOS_BR = "centavos_br"
+DATA = "data"
+
+
+def converter(valores, tipo):
+    """Converte uma lista de valores brutos (texto) para o dtype do schema, de uma vez."""
+    serie = pd.Series(valores, dtype=object)
+    if tipo == TEXTO:
+        return serie
+    if tipo == CATEGORIA:
+        return serie.astype("category")
+    if tipo == DECIMAL_BR:
+        serie = serie.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        return pd.to_numeric(serie, errors="coerce").astype("float64")
+    if tipo == CENTAVOS:
+        return centavos(serie)
+    if tipo == CENTAVOS_BR:
+        return centavos(serie, decimal=",")
+    if tipo == DECIMAL:
+        return pd.to_numeric(serie, errors="coerce").astype("float64")
+    if tipo == INTEIRO:
+        numeros = pd.to_numeric(serie, errors="coerce")
+        return numeros if numeros.hasnans else numeros.astype("int64")
+    if tipo == DATA:
+        # Data/hora ISO (dhEmi, dhEvento): o fuso é descartado e vale o horário local do documento
+        return pd.to_datetime(serie.str.slice(0, 19), format="ISO8601", errors="coerce")
+    raise ValueError(f"Tipo de coluna desconhecido: {tipo}")
+
+
+def concatenar(blocos):
+    """Concatena DataFrames tipados preservando as colunas categóricas."""
+    if len(blocos) == 1:
+        return blocos[0]
+    colunas = {}
+    for col in blocos[0].columns:
+        partes = [bloco[col] for bloco in blocos]
+        if isinstance(partes[0].dtype, pd.CategoricalDtype):
+            colunas[col] = pd.Series(union_categoricals(partes, sort_categories=True))
+        else:
+            colunas[col] = pd.concat(partes, ignore_index=True)
+    return pd.DataFrame(colunas)
+
+
+def blocos(tabela):
+    """Blocos (DataFrames) de `tabela`: um DataFrame é um bloco só; tabelas em blocos usam `blocos()`."""
+    if isinstance(tabela, pd.DataFrame):
+        return iter((tabela,))
+    return tabela.blocos()
+
+
+class AcumuladorColunar:
+    """Acumula linhas (tuplas na ordem do schema) em listas por coluna.
+
+    A cada `tamanho_bloco` linhas os valores pendentes são convertidos em um
+    bloco tipado (float64, int64, Int64 em centavos, category, datetime64), liberando as strings
+    brutas. `para_dataframe` junta os blocos no DataFrame final.
+
+    Com `limite_mb`, quando os blocos em memória passam do limite eles são
+    gravados em Parquet numa pasta temporária (em `pasta`, ou na do
+    sistema) e `blocos()` os relê um por vez. A pasta é apagada por
+    `fechar()` (ou ao sair do `with`). `preparar`, se houver, é aplicado a
+    cada bloco tipado ao ser fechado, antes de guardá-lo.
+    """
+
+    def __init__(self, schema, tamanho_bloco=100_000, limite_mb=None, pasta=None, preparar=None):
+        self.schema = dict(schema)
+        self.tamanho_bloco = tamanho_bloco
+        self.preparar = preparar
+        self.limite_bytes = limite_mb * 1024 * 1024 if limite_mb else None
+        self.pasta = pasta
+        self._pendentes = [[] for _ in self.schema]
+        self._blocos = []
+        self._bytes_blocos = 0
+        self._em_disco = []
+        self._linhas_em_disco = 0
+        self._temporaria = None
+        self._limpeza = None
+
+    def __len__(self):
+        return self._linhas_em_disco + sum(len(bloco) for bloco in self._blocos) + len(self._pendentes[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        self.fechar()
+        return False
+
+    @property
+    def em_disco(self):
+        return len(self._em_disco)
+
+    def adicionar(self, linha):
+        for coluna, valor in zip(self._pendentes, linha):
+            coluna.append(valor)
+        if len(self._pendentes[0]) >= self.tamanho_bloco:
+            self._fechar_bloco()
+
+    def estender(self, linhas):
+        for coluna, valores in zip(self._pendentes, zip(*linhas)):
+            coluna.extend(valores)
+        if len(self._pendentes[0]) >= self.tamanho_bloco:
+            self._fechar_bloco()
+
+    def _fechar_bloco(self):
+        if not self._pendentes[0]:
+            return
+        bloco = pd.DataFrame({
+            col: converter(valores, tipo)
+            for (col, tipo), valores in zip(self.schema.items(), self._pendentes)
+        })
+        self._pendentes = [[] for _ in self.schema]
+        if self.preparar is not None:
+            bloco = self.preparar(bloco)
+        self._blocos.append(bloco)
+        if self.limite_bytes:
+            self._bytes_blocos += int(bloco.memory_usage(deep=True).sum())
+            if self._bytes_blocos > self.limite_bytes:
+                self._descarregar()
+
+    def concluir(self):
+        """Converte as linhas pendentes em bloco (ao fim da carga, para o custo não cair na primeira leitura)."""
+        self._fechar_bloco()
+
+    def _descarregar(self):
+        # Grava os blocos em memória, na ordem, um arquivo por bloco
+        if self._temporaria is None:
+            self._temporaria = tempfile.mkdtemp(prefix="fiscai-", dir=self.pasta)
+            # Rede de segurança se o acumulador for descartado sem fechar()
+            self._limpeza = weakref.finalize(self, shutil.rmtree, self._temporaria, True)
+        for bloco in self._blocos:
+            caminho = os.path.join(self._temporaria, f"bloco_{len(self._em_disco):05d}.parquet")
+            bloco.to_parquet(caminho, index=False)
+            tipos = {col: tipo for col, tipo in bloco.dtypes.items() if not isinstance(tipo, pd.CategoricalDtype)}
+            self._em_disco.append((caminho, tipos))
+            self._linhas_em_disco += len(bloco)
+        self._blocos = []
+        self._bytes_blocos = 0
+
+    def blocos(self):
+        """Gera os blocos tipados (DataFrames) na ordem das linhas, relendo os que foram para o disco.
+
+        Sem nenhuma linha, gera um único bloco vazio com as colunas do schema.
+        """
+        self._fechar_bloco()
+        if not self._em_disco and not self._blocos:
+            vazio = pd.DataFrame({col: converter([], tipo) for col, tipo in self.schema.items()})
+            yield self.preparar(vazio) if self.preparar is not None else vazio
+            return
+        for caminho, tipos in self._em_disco:
+            # O Parquet devolve texto como `str` (ausente = NaN) e datas em outra resolução; volta ao bloco original
+            bloco = pd.read_parquet(caminho).astype(tipos)
+            for col, tipo in tipos.items():
+                if tipo == object:
+                    bloco[col] = bloco[col].where(bloco[col].notna(), None)
+            yield bloco
+        yield from self._blocos
+
+    def para_dataframe(self):
+        return concatenar(list(self.blocos()))
+
+    def fechar(self):
+        """Apaga os blocos gravados em disco; o acumulador não deve ser usado depois."""
+        if self._limpeza is not None:
+            self._limpeza()
+        self._em_disco = []
+        self._blocos = []
+
+
+class TabelaEmBlocos:
+    """Tabela percorrida bloco a bloco (DataFrames), sem juntar tudo em memória.
+
+    `origem` é um DataFrame ou qualquer objeto com `blocos()` (um
+    AcumuladorColunar, outra TabelaEmBlocos) e `transformar` é aplicado a
+    cada bloco ao percorrer; cada chamada de `blocos()` percorre a origem de
+    novo. `fechar()` (ou o `with`) libera os blocos em disco da origem.
+    """
+
+    def __init__(self, origem, transformar=None):
+        self.origem = origem
+        self.transformar = transformar
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        self.fechar()
+        return False
+
+    def blocos(self):
+        for bloco in blocos(self.origem):
+            yield self.transformar(bloco) if self.transformar else bloco
+
+    def mapear(self, transformar):
+        return TabelaEmBlocos(self, transformar)
+
+    def para_dataframe(self):
+        return concatenar(list(self.blocos()))
+
+    def fechar(self):
+        fechar = getattr(self.origem, "fechar", None)
+        if fechar is not None:
+            fechar()
@@ -1,7 +1,30 @@
 
+import os
+import weakref
 import streamlit as st
-import pandas as pd
-import io
+from tempfile import mkstemp
+from ferramentas import tarefas
+from ferramentas.nucleo.xlsx_csv import converter_planilha
+
+def converter_upload(tarefa, arquivo):
+    # Em segundo plano; o CSV é escrito em lotes num arquivo temporário em disco e a tarefa guarda só o caminho.
+    # O arquivo é lido no clique do download e apagado quando a tarefa sai da memória.
+    def progresso(linhas):
+        tarefa.avancar(texto=f"{linhas} linhas convertidas")
+
+    descritor, caminho = mkstemp(prefix="fiscai-csv-", suffix=".csv")
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            linhas = converter_planilha(arquivo, destino, progresso=progresso)
+    except BaseException:
+        os.remove(caminho)
+        raise
+    weakref.finalize(tarefa, os.remove, caminho)
+    return {"csv": caminho, "linhas": linhas}
+
+def ler_csv(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
 
 def app():
     st.title("🔄 Conversor XLSX para CSV")
@@ -28,40 +51,14 @@ def app():
         unsafe_allow_html=True
     )
 
-    if uploaded_file is not None:
-        try:
-            df = pd.read_excel(uploaded_file)
-        except Exception as e:
-            st.error(f"Erro ao ler o arquivo: {e}")
-            return
-
-        # Formata a coluna 'rendimento' para garantir sempre duas casas decimais
-        col_rendimento = None
-        for col in df.columns:
-            if col.strip().lower() == 'rendimento':
-                col_rendimento = col
-                break
-        if col_rendimento:
-            def format_rendimento(x):
-                if pd.isnull(x) or x == "":
-                    return ""
-                try:
-                    x_str = str(x).replace(',', '.').strip()
-                    num = float(x_str)
-                    return f"{num:,.2f}".replace('.', ',')
-                except Exception:
-                    return str(x)
-            df[col_rendimento] = df[col_rendimento].apply(format_rendimento)
-
-        # Salva CSV em buffer
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False, sep=',', encoding='utf-8')
-        csv_data = csv_buffer.getvalue()
+    tarefa = tarefas.executar("xlsx-csv", uploaded_file, converter_upload)
 
+    if tarefa is not None:
         st.success("Conversão realizada com sucesso!")
+        caminho = tarefa.resultado["csv"]
         st.download_button(
             label="Baixar CSV",
-            data=csv_data,
+            data=lambda: ler_csv(caminho),
             file_name="convertido.csv",
             mime="text/csv"
         )
@@ -0,0 +1,132 @@
+import codecs
+import gzip
+import os
+import zipfile
+
+from ferramentas import medicao
+from ferramentas.colunar import blocos
+
+# Formatos de saída das ferramentas. O XLSX é a planilha formatada de cada
+# ferramenta (abas acima do limite do Excel continuam em <aba>_2, <aba>_3...);
+# CSV.gz e Parquet levam só os dados, gravados bloco a bloco, e servem aos
+# meses grandes: o Parquet sai em segundos e abre em pandas/Power BI/DuckDB.
+# Relatórios com várias abas viram um ZIP com um arquivo por aba.
+FORMATOS = {
+    "xlsx": {"rotulo": "Excel (.xlsx)", "extensao": ".xlsx",
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "csv": {"rotulo": "CSV (.csv)", "extensao": ".csv", "mime": "text/csv"},
+    "csv.gz": {"rotulo": "CSV compactado (.csv.gz)", "extensao": ".csv.gz", "mime": "application/gzip"},
+    "parquet": {"rotulo": "Parquet (.parquet)", "extensao": ".parquet", "mime": "application/vnd.apache.parquet"},
+}
+# Formatos oferecidos na tela
+FORMATOS_TELA = ("xlsx", "csv.gz", "parquet")
+# Linhas por row group no Parquet (blocos maiores são divididos)
+LINHAS_POR_GRUPO = int(os.environ.get("FISCAI_PARQUET_LINHAS", "100000"))
+
+
+def gravar_csv(tabela, destino, compactar=False):
+    """Grava `tabela` (DataFrame ou tabela em blocos) como CSV em `destino` (caminho ou arquivo binário).
+
+    Usa `;` como separador e vírgula decimal, como o Excel em português abre;
+    com `compactar`, o CSV vai dentro de um gzip.
+    """
+    bruto = open(destino, "wb") if isinstance(destino, (str, os.PathLike)) else None
+    saida = gzip.GzipFile(fileobj=bruto or destino, mode="wb") if compactar else (bruto or destino)
+    try:
+        # O BOM vai uma vez só, no início; os blocos seguintes não repetem o cabeçalho
+        saida.write(codecs.BOM_UTF8)
+        for i, bloco in enumerate(blocos(tabela)):
+            saida.write(bloco.to_csv(index=False, header=i == 0, sep=";", decimal=",").encode("utf-8"))
+    finally:
+        if compactar:
+            saida.close()
+        if bruto:
+            bruto.close()
+
+
+def _schema_parquet(tabela_arrow):
+    # Schema fixo a partir do primeiro bloco: colunas só com nulos viram texto e
+    # categorias usam índices int32, para os blocos seguintes caberem nele
+    import pyarrow as pa
+
+    campos = []
+    for campo in tabela_arrow.schema:
+        tipo = campo.type
+        if pa.types.is_null(tipo):
+            tipo = pa.string()
+        elif pa.types.is_dictionary(tipo):
+            tipo = pa.dictionary(pa.int32(), pa.string() if pa.types.is_null(tipo.value_type) else tipo.value_type)
+        campos.append(pa.field(campo.name, tipo))
+    return pa.schema(campos, metadata=tabela_arrow.schema.metadata)
+
+
+def gravar_parquet(tabela, destino, linhas_por_grupo=None):
+    """Grava `tabela` (DataFrame ou tabela em blocos) em Parquet, um row group por bloco de até `linhas_por_grupo`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    linhas_por_grupo = linhas_por_grupo or LINHAS_POR_GRUPO
+    escritor = None
+    try:
+        for bloco in blocos(tabela):
+            tabela_arrow = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                schema = _schema_parquet(tabela_arrow)
+                escritor = pq.ParquetWriter(destino, schema, compression="zstd")
+            escritor.write_table(tabela_arrow.cast(schema), row_group_size=linhas_por_grupo)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+@medicao.medida("exportar")
+def gravar_tabela(tabela, formato, destino):
+    """Grava uma tabela em `formato` (csv, csv.gz ou parquet) em `destino` (caminho ou arquivo binário)."""
+    if formato == "parquet":
+        gravar_parquet(tabela, destino)
+    elif formato in ("csv", "csv.gz"):
+        gravar_csv(tabela, destino, compactar=formato == "csv.gz")
+    else:
+        raise ValueError(f"Formato sem gravação de tabela: {formato}")
+
+
+def sem_extensao(caminho, formato):
+    """`caminho` sem a extensão do formato (".csv.gz" conta inteira)."""
+    extensao = FORMATOS[formato]["extensao"]
+    if caminho.lower().endswith(extensao):
+        return caminho[:-len(extensao)]
+    return os.path.splitext(caminho)[0]
+
+
+def nome_arquivo(base, formato, abas=1):
+    """Nome do download: `base` com a extensão do formato, ou .zip para várias abas fora do XLSX."""
+    if formato != "xlsx" and abas > 1:
+        return f"{base}.zip"
+    return base + FORMATOS[formato]["extensao"]
+
+
+def mime(formato, abas=1):
+    if formato != "xlsx" and abas > 1:
+        return "application/zip"
+    return FORMATOS[formato]["mime"]
+
+
+def exportar(abas, formato, destino, gravar_xlsx):
+    """Grava as `abas` ({nome: DataFrame ou tabela em blocos}) em `destino` no `formato` escolhido.
+
+    No XLSX chama `gravar_xlsx(abas, destino)`, a planilha formatada da
+    ferramenta. Nos demais, uma aba vira um arquivo só e várias viram um ZIP
+    com `<aba><extensão>` cada, sem recompactar (o CSV.gz e o Parquet já
+    são compactados).
+    """
+    if formato == "xlsx":
+        gravar_xlsx(abas, destino)
+        return
+    if len(abas) == 1:
+        gravar_tabela(next(iter(abas.values())), formato, destino)
+        return
+    compressao = zipfile.ZIP_DEFLATED if formato == "csv" else zipfile.ZIP_STORED
+    with zipfile.ZipFile(destino, "w", compressao) as zip_saida:
+        for nome, tabela in abas.items():
+            with zip_saida.open(nome + FORMATOS[formato]["extensao"], "w", force_zip64=True) as membro:
+                gravar_tabela(tabela, formato, membro)
@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import zipfile
+
+
+def _aceito(nome, extensoes):
+    # Ignora metadados do macOS (__MACOSX/, ._arquivo) e compara extensões sem diferenciar maiúsculas
+    base = nome.rsplit("/", 1)[-1]
+    if nome.startswith("__MACOSX/") or base.startswith("._"):
+        return False
+    return nome.lower().endswith(extensoes)
+
+
+def iterar_membros(arquivo, extensoes, prefixo=""):
+    """Gera (nome, bytes) de cada membro do ZIP com uma das `extensoes`.
+
+    `arquivo` pode ser o upload em memória, um caminho ou bytes. Os membros
+    são lidos um a um direto do buffer, sem extração para disco; subpastas
+    são percorridas e ZIPs internos são abertos recursivamente. O nome
+    devolvido inclui o caminho dentro do ZIP (e do ZIP interno, se houver).
+    """
+    if isinstance(arquivo, (bytes, bytearray)):
+        arquivo = io.BytesIO(arquivo)
+    extensoes = tuple(ext.lower() for ext in extensoes)
+    with zipfile.ZipFile(arquivo) as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            nome = info.filename
+            if nome.lower().endswith(".zip"):
+                yield from iterar_membros(zip_ref.read(info), extensoes, f"{prefixo}{nome}/")
+            elif _aceito(nome, extensoes):
+                yield f"{prefixo}{nome}", zip_ref.read(info)
+
+
+def iterar_arquivos(uploads, extensoes):
+    """Como `iterar_membros`, para uma lista de uploads que mistura ZIPs e arquivos soltos."""
+    extensoes = tuple(ext.lower() for ext in extensoes)
+    for upload in uploads:
+        if upload.name.lower().endswith(".zip"):
+            yield from iterar_membros(upload, extensoes)
+        elif _aceito(upload.name, extensoes):
+            yield upload.name, upload.getvalue()
+
+
+def contar_membros(arquivo, extensoes):
+    """Quantos membros `iterar_membros` devolveria, lendo só o índice do ZIP (e dos ZIPs internos)."""
+    if isinstance(arquivo, (bytes, bytearray)):
+        arquivo = io.BytesIO(arquivo)
+    extensoes = tuple(ext.lower() for ext in extensoes)
+    total = 0
+    with zipfile.ZipFile(arquivo) as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            if info.filename.lower().endswith(".zip"):
+                total += contar_membros(zip_ref.read(info), extensoes)
+            elif _aceito(info.filename, extensoes):
+                total += 1
+    return total
+
+
+def contar_arquivos(uploads, extensoes):
+    """Quantos arquivos `iterar_arquivos` devolveria, para dimensionar barras de progresso."""
+    extensoes = tuple(ext.lower() for ext in extensoes)
+    total = 0
+    for upload in uploads:
+        if upload.name.lower().endswith(".zip"):
+            total += contar_membros(upload, extensoes)
+        elif _aceito(upload.name, extensoes):
+            total += 1
+    return total
+
+
+def _arquivo_em_disco(caminho, extensoes):
+    if caminho.lower().endswith(".zip"):
+        yield from iterar_membros(caminho, extensoes)
+    elif _aceito(caminho, extensoes):
+        with open(caminho, "rb") as f:
+            yield caminho, f.read()
+
+
+def iterar_caminhos(caminhos, extensoes):
+    """Como `iterar_arquivos`, para caminhos em disco (uso na linha de comando).
+
+    Cada caminho pode ser um arquivo solto, um ZIP ou uma pasta; pastas são
+    percorridas recursivamente em ordem alfabética, abrindo os ZIPs que houver.
+    """
+    extensoes = tuple(ext.lower() for ext in extensoes)
+    for caminho in caminhos:
+        if not os.path.isdir(caminho):
+            yield from _arquivo_em_disco(caminho, extensoes)
+            continue
+        for raiz, pastas, arquivos in os.walk(caminho):
+            pastas.sort()
+            for nome in sorted(arquivos):
+                yield from _arquivo_em_disco(os.path.join(raiz, nome), extensoes)
+
+
+def digest_uploads(uploads):
+    """SHA-256 do nome e do conteúdo de um upload (ou lista de uploads).
+
+    Serve de chave para as tarefas em segundo plano entre reruns: o mesmo
+    arquivo reenviado reaproveita a tarefa, e qualquer alteração gera outra.
+    """
+    if not isinstance(uploads, (list, tuple)):
+        uploads = [uploads]
+    h = hashlib.sha256()
+    for upload in uploads:
+        h.update(upload.name.encode())
+        h.update(b"\0")
+        h.update(upload.getbuffer())
+        h.update(b"\0")
+    return h.hexdigest()
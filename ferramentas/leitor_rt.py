@@ -1,84 +1,36 @@
 # ferramentas/leitor_rt.py
 
 import streamlit as st
-import pandas as pd
-import zipfile
-import os
-import tempfile
-import xml.etree.ElementTree as ET
-import re
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-from concurrent.futures import ThreadPoolExecutor
-
-def map_crt(crt):
-    return {
-        '1': 'Simples Nacional',
-        '2': 'Simples Nacional, excesso sublimite de receita bruta',
-        '3': 'Regime Normal',
-        '4': 'Microempreendedor Individual'
-    }.get(crt, 'Não identificado')
-
-def format_cnpj_cpf(doc):
-    doc = re.sub(r'\D', '', doc)
-    if len(doc) == 14:
-        return f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}"
-    elif len(doc) == 11:
-        return f"{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}"
-    return doc
-
-def process_xml_file(xml_file, ns):
+from io import BytesIO
+from ferramentas import exportar, medicao, tarefas
+from ferramentas.cache_extracao import abrir_cache
+from ferramentas.fonte_zip import iterar_membros, contar_membros
+from ferramentas.nucleo.regime import EXTRATOR, VERSAO_EXTRATOR, carregar, formatar_saida, gerar_excel_formatado
+
+def processar_zip(tarefa, arquivo, formato="xlsx"):
+    # Em segundo plano: extrai os XMLs, remove as duplicidades e grava o arquivo no formato escolhido; o resultado fica na tarefa
+    total = contar_membros(arquivo, (".xml",))
+    cache = abrir_cache(EXTRATOR, VERSAO_EXTRATOR)
     try:
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        cnpj = root.find('.//ns:emit/ns:CNPJ', ns)
-        nome = root.find('.//ns:emit/ns:xNome', ns)
-        crt = root.find('.//ns:emit/ns:CRT', ns)
-        if cnpj is not None and nome is not None and crt is not None:
-            return {
-                'CNPJ': cnpj.text,
-                'Nome da Empresa': nome.text,
-                'Regime Tributário': map_crt(crt.text)
-            }
-    except:
-        return None
-
-def gerar_excel_formatado(df, caminho_saida, total_lidos, removidos, total_extraidos):
-    df['CNPJ'] = df['CNPJ'].apply(format_cnpj_cpf)
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Regime_Tributário"
-    ws.sheet_view.showGridLines = False
-
-    ws['A1'] = f"Total de XMLs lidos: {total_lidos}"
-    ws['B1'] = f"Duplicidades removidas: {removidos}"
-    ws['C1'] = f"Total após exclusão: {total_extraidos}"
-    ws.merge_cells('A1:C1')
-    ws['A1'].font = Font(bold=True)
-    ws['A1'].alignment = Alignment(horizontal="center")
-
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 3):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            if r_idx == 3:
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_cells in ws.iter_cols(min_row=3):
-        col_letter = col_cells[0].column_letter
-        max_length = 0
-        for cell in col_cells:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                continue
-        adjusted_width = max_length * 1.2 + 2
-        ws.column_dimensions[col_letter].width = adjusted_width
-
-    wb.save(caminho_saida)
+        df, total_lidos = carregar(tarefa.acompanhar(iterar_membros(arquivo, (".xml",)), total, "XMLs lidos"), cache)
+        resumo_cache = cache.resumo() if cache else None
+    finally:
+        if cache:
+            cache.fechar()
+
+    total_antes = len(df)
+    with medicao.etapa("remover duplicidades"):
+        df = df.drop_duplicates()
+    removidos = total_antes - len(df)
+
+    output = BytesIO()
+    if not df.empty:
+        tarefa.avancar(texto="Gerando arquivo...")
+        exportar.exportar({"Regime_Tributário": formatar_saida(df)}, formato, output,
+                          lambda abas, destino: gerar_excel_formatado(df, destino, total_lidos, removidos, len(df)))
+    # Na tarefa fica só a prévia da tabela; os dados completos estão no arquivo
+    return {"df": tarefas.previa(df), "extraidos": len(df), "total_lidos": total_lidos, "removidos": removidos,
+            "arquivo": output.getvalue(), "formato": formato, "cache": resumo_cache}
 
 def app():
     st.title("📁 XML NF-e | Regime Tributário")
@@ -89,49 +41,33 @@ Suporta o processamento de grandes volumes de XMLs, garantindo eficiência mesmo
 """)
 
     uploaded_file = st.file_uploader(" Envie o arquivo (.zip) contendo os XMLs das NF-e", type="zip")
-
-    if uploaded_file is not None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            zip_path = os.path.join(tmpdir, "arquivo.zip")
-            with open(zip_path, "wb") as f:
-                f.write(uploaded_file.getvalue())
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(tmpdir)
-
-            xml_files = []
-            for root_dir, dirs, files in os.walk(tmpdir):
-                for file in files:
-                    if file.lower().endswith('.xml'):
-                        xml_files.append(os.path.join(root_dir, file))
-
-            ns = {'ns': 'http://www.portalfiscal.inf.br/nfe'}
-            with ThreadPoolExecutor() as executor:
-                resultados = list(executor.map(lambda x: process_xml_file(x, ns), xml_files))
-
-            resultados_filtrados = [r for r in resultados if r]
-            total_lidos = len(resultados)
-            df = pd.DataFrame(resultados_filtrados)
-            total_antes = len(df)
-            df = df.drop_duplicates()
-            total_depois = len(df)
-            removidos = total_antes - total_depois
-
-            if not df.empty:
-                st.success(f"✅ {total_depois} XMLs extraídos com sucesso.")
-                st.info(f"📄 Total de XMLs lidos: {total_lidos}")
-                st.info(f"♻️ Duplicidades removidas: {removidos}")
-                st.info(f"📊 Total após exclusão: {total_depois}")
-                st.dataframe(df)
-
-                excel_path = os.path.join(tmpdir, "Regime_Tributario_Formatado.xlsx")
-                gerar_excel_formatado(df, excel_path, total_lidos, removidos, total_depois)
-
-                with open(excel_path, "rb") as f:
-                    st.download_button(
-                        label="📥 Baixar Planilha",
-                        data=f,
-                        file_name="Regime_Tributario.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-            else:
-                st.warning("⚠️ Nenhum dado foi extraído. Verifique se os arquivos XML estão no padrão correto.")
+    formato = st.radio("Formato do arquivo", exportar.FORMATOS_TELA, horizontal=True,
+                       format_func=lambda f: exportar.FORMATOS[f]["rotulo"], key="formato_rt",
+                       help="Para volumes muito grandes, CSV.gz e Parquet saem mais rápido.")
+
+    tarefa = tarefas.executar("rt", uploaded_file, processar_zip, formato)
+
+    if tarefa is not None:
+        resultado = tarefa.resultado
+        df, extraidos = resultado["df"], resultado["extraidos"]
+        if resultado["cache"]:
+            st.caption(resultado["cache"])
+
+        if extraidos:
+            st.success(f"✅ {extraidos} XMLs extraídos com sucesso.")
+            st.info(f"📄 Total de XMLs lidos: {resultado['total_lidos']}")
+            st.info(f"♻️ Duplicidades removidas: {resultado['removidos']}")
+            st.info(f"📊 Total após exclusão: {extraidos}")
+            st.dataframe(df)
+            if extraidos > len(df):
+                st.caption(f"Exibindo as primeiras {len(df)} de {extraidos} linhas; a planilha traz todas.")
+
+            formato = resultado["formato"]
+            st.download_button(
+                label="📥 Baixar Planilha" if formato == "xlsx" else "📥 Baixar Arquivo",
+                data=resultado["arquivo"],
+                file_name=exportar.nome_arquivo("Regime_Tributario", formato),
+                mime=exportar.mime(formato)
+            )
+        else:
+            st.warning("⚠️ Nenhum dado foi extraído. Verifique se os arquivos XML estão no padrão correto.")
@@ -0,0 +1,240 @@
+import contextvars
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sem ru_maxrss
+    resource = None
+
+# Medição de tempo e memória por etapa. As ferramentas marcam as etapas com
+# `etapa(nome)` / `@medida(nome)` e passam os arquivos lidos por `iterar`;
+# fora de uma `sessao()` essas chamadas só consultam uma ContextVar e não
+# medem nada. FISCAI_MEDICAO=1 liga a medição por padrão na tela e na linha
+# de comando; FISCAI_MEDICAO=memoria inclui o pico de alocações Python
+# (tracemalloc), que deixa o processamento bem mais lento.
+MEDICAO_PADRAO = os.environ.get("FISCAI_MEDICAO", "").strip().lower()
+
+_sessao = contextvars.ContextVar("fiscai_medicao", default=None)
+_NULA = nullcontext()
+_MB = 1024 * 1024
+
+
+def rss_mb():
+    """RSS atual do processo em MB (Linux, via /proc); None em outros sistemas."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf("SC_PAGE_SIZE") / _MB, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def pico_rss_mb():
+    """Pico de RSS do processo em MB; ru_maxrss vem em KB no Linux e em bytes no macOS."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (_MB if sys.platform == "darwin" else 1024), 1)
+
+
+def _cpu_filhos():
+    # CPU dos processos filhos já encerrados (o pool de extração conta ao ser fechado)
+    tempos = os.times()
+    return tempos.children_user + tempos.children_system
+
+
+def tamanho(arquivo):
+    """Bytes de um caminho, upload do Streamlit ou BytesIO, sem ler o conteúdo (0 se não souber)."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        return os.path.getsize(arquivo)
+    tamanho_upload = getattr(arquivo, "size", None)
+    if isinstance(tamanho_upload, int):
+        return tamanho_upload
+    if hasattr(arquivo, "getbuffer"):
+        return arquivo.getbuffer().nbytes
+    return 0
+
+
+class _Etapa:
+    # Registro de uma etapa: entra na lista da sessão ao começar (na ordem de início) e é completado ao fim
+
+    def __init__(self, sessao, nome, arquivos, bytes_):
+        self.sessao = sessao
+        self.registro = {"etapa": nome, "nivel": len(sessao.pilha), "arquivos": arquivos, "bytes": bytes_}
+        self.pico_filhas = 0
+
+    def __enter__(self):
+        sessao = self.sessao
+        sessao.registros.append(self.registro)
+        if sessao.memoria:
+            # O pico do tracemalloc é zerado a cada etapa; o pico visto até aqui fica guardado na etapa de fora
+            atual, pico = tracemalloc.get_traced_memory()
+            if sessao.pilha:
+                sessao.pilha[-1].pico_filhas = max(sessao.pilha[-1].pico_filhas, pico)
+            tracemalloc.reset_peak()
+            self.memoria_inicial = atual
+        sessao.pilha.append(self)
+        self.cpu_filhos = _cpu_filhos()
+        self.cpu = time.process_time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        parede = time.perf_counter() - self.inicio
+        cpu = time.process_time() - self.cpu
+        cpu_filhos = _cpu_filhos() - self.cpu_filhos
+        sessao = self.sessao
+        sessao.pilha.pop()
+        self.registro.update(
+            parede_s=parede, cpu_s=cpu, cpu_filhos_s=cpu_filhos, rss_mb=rss_mb(), pico_rss_mb=pico_rss_mb()
+        )
+        if sessao.memoria:
+            pico = max(tracemalloc.get_traced_memory()[1], self.pico_filhas)
+            self.registro["pico_python_mb"] = (pico - self.memoria_inicial) / _MB
+            if sessao.pilha:
+                sessao.pilha[-1].pico_filhas = max(sessao.pilha[-1].pico_filhas, pico)
+        if tipo is not None:
+            self.registro["erro"] = tipo.__name__
+        return False
+
+
+class Sessao:
+    """Etapas medidas durante uma execução, na ordem em que começaram.
+
+    Cada registro traz o nome da etapa, o nível de aninhamento, o tempo de
+    parede, a CPU do processo e dos filhos encerrados (o pool de extração),
+    os arquivos e bytes processados, o RSS atual e o pico de RSS do
+    processo ao fim da etapa e, com `memoria`, quanto as alocações Python
+    subiram no pico em relação ao início da etapa. O tracemalloc e o RSS
+    são do processo todo: no Streamlit, sessões simultâneas se misturam.
+    """
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.inicio = datetime.now()
+        self.registros = []
+        self.pilha = []
+
+    def etapa(self, nome, arquivos=0, bytes=0):
+        return _Etapa(self, nome, arquivos, bytes)
+
+    def iterar(self, nome, itens):
+        # O registro nasce na primeira leitura, aninhado na etapa que consome os itens
+        registro = {"etapa": nome, "nivel": len(self.pilha), "arquivos": 0, "bytes": 0, "parede_s": 0.0, "cpu_s": 0.0}
+        self.registros.append(registro)
+        iterador = iter(itens)
+        while True:
+            inicio, cpu = time.perf_counter(), time.process_time()
+            item = next(iterador, None)
+            registro["parede_s"] += time.perf_counter() - inicio
+            registro["cpu_s"] += time.process_time() - cpu
+            if item is None:
+                return
+            registro["arquivos"] += 1
+            registro["bytes"] += len(item[1])
+            yield item
+
+    def resumo(self):
+        """Registros com tempos arredondados (ms) e memória em MB com uma casa."""
+        return [
+            {chave: round(valor, 1 if chave.endswith("_mb") else 3) if isinstance(valor, float) else valor
+             for chave, valor in registro.items()}
+            for registro in self.registros
+        ]
+
+    def exportar(self, **extras):
+        return {"inicio": self.inicio.isoformat(timespec="seconds"), "memoria": self.memoria, **extras,
+                "etapas": self.resumo()}
+
+    def linhas(self):
+        """Uma linha de texto por etapa, indentada pelo nível, para a linha de comando."""
+        linhas = []
+        for registro in self.resumo():
+            nome = "  " * registro["nivel"] + registro["etapa"]
+            linha = f"{nome:<32} {registro['parede_s']:>9.3f}s  cpu {registro['cpu_s']:>8.3f}s"
+            if registro.get("cpu_filhos_s"):
+                linha += f" (+{registro['cpu_filhos_s']:.3f}s filhos)"
+            if registro["arquivos"] or registro["bytes"]:
+                linha += f"  {registro['arquivos']} arquivo(s), {registro['bytes'] / _MB:.1f} MB"
+            if registro.get("pico_rss_mb") is not None:
+                linha += f"  pico RSS {registro['pico_rss_mb']} MB"
+            if "pico_python_mb" in registro:
+                linha += f"  pico Python +{registro['pico_python_mb']} MB"
+            linhas.append(linha)
+        return linhas
+
+
+@contextmanager
+def sessao(ativa=True, memoria=False):
+    """Mede as etapas executadas dentro do bloco; entrega a `Sessao` (ou None, se `ativa` for falso)."""
+    if not ativa:
+        yield None
+        return
+    atual = Sessao(memoria)
+    iniciou_tracemalloc = memoria and not tracemalloc.is_tracing()
+    if iniciou_tracemalloc:
+        tracemalloc.start()
+    token = _sessao.set(atual)
+    try:
+        yield atual
+    finally:
+        _sessao.reset(token)
+        if iniciou_tracemalloc:
+            tracemalloc.stop()
+
+
+def ativa():
+    """Se há uma sessão de medição no contexto atual."""
+    return _sessao.get() is not None
+
+
+def incorporar(nome, registros, duracao):
+    """Acrescenta à sessão atual, sob a etapa `nome`, registros medidos em outra sessão (ex.: numa tarefa)."""
+    atual = _sessao.get()
+    if atual is None or not registros:
+        return
+    nivel = len(atual.pilha)
+    cpu = sum(registro.get("cpu_s", 0) for registro in registros if registro["nivel"] == 0)
+    atual.registros.append({"etapa": nome, "nivel": nivel, "arquivos": 0, "bytes": 0, "parede_s": duracao, "cpu_s": cpu})
+    atual.registros.extend({**registro, "nivel": registro["nivel"] + nivel + 1} for registro in registros)
+
+
+def etapa(nome, arquivos=0, bytes=0):
+    """Context manager que mede uma etapa na sessão atual; sem sessão, não faz nada."""
+    atual = _sessao.get()
+    if atual is None:
+        return _NULA
+    return atual.etapa(nome, arquivos, bytes)
+
+
+def medida(nome):
+    """Decorador: mede cada chamada da função como a etapa `nome`."""
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medir(*args, **kwargs):
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+        return medir
+    return decorar
+
+
+def iterar(nome, itens):
+    """Repassa os (nome, bytes) de `itens` contando arquivos, bytes e o tempo gasto lendo-os.
+
+    Sem sessão ativa devolve `itens` como estão.
+    """
+    atual = _sessao.get()
+    if atual is None:
+        return itens
+    return atual.iterar(nome, itens)
+
+
+def para_json(dados):
+    return json.dumps(dados, ensure_ascii=False, indent=2)
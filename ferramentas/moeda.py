@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Valores monetários em centavos (Int64, inteiro com nulos). O texto do XML
+# ("1234.56"), do TXT ("R$ 1.234,56") ou do PDF ("1.234,56") é convertido em
+# bloco; somas e agrupamentos ficam em inteiros e a conversão para reais
+# acontece só na hora de exibir ou gravar.
+
+
+def centavos(serie, decimal="."):
+    """Converte uma série de textos em centavos (Int64); o que não for número vira <NA>.
+
+    Com `decimal=","` o ponto é separador de milhar e "R$"/espaços são
+    ignorados. O número lido é arredondado para o centavo mais próximo:
+    com até duas casas e abaixo de 10^13 reais o resultado é exato, e o
+    parse vetorizado custa o mesmo que um `pd.to_numeric`.
+    """
+    texto = pd.Series(serie, dtype=object)
+    if decimal == ",":
+        texto = (
+            texto
+            .str.replace(".", "", regex=False)
+            .str.replace(",", ".", regex=False)
+            .str.replace("R$", "", regex=False)
+            .str.replace(" ", "", regex=False)
+        )
+    numeros = pd.to_numeric(texto, errors="coerce").to_numpy(dtype="float64")
+    valores = np.rint(numeros * 100)
+    valores[~np.isfinite(valores)] = np.nan
+    return pd.Series(pd.array(valores, dtype="Int64"), index=texto.index)
+
+
+def reais(serie):
+    """Centavos → reais (float64, <NA> vira NaN), para exibição e planilhas."""
+    return pd.Series(serie.to_numpy(dtype="float64", na_value=np.nan) / 100, index=serie.index, name=serie.name)
+
+
+def em_reais(df, colunas):
+    """Cópia de `df` com as `colunas` em centavos convertidas para reais."""
+    return df.assign(**{col: reais(df[col]) for col in colunas})
+
+
+def formatar(valor):
+    """Centavos (int) → "R$ 1.234,56", sem arredondamento de float."""
+    if pd.isna(valor):
+        return ""
+    sinal = "-" if valor < 0 else ""
+    inteiro, resto = divmod(abs(int(valor)), 100)
+    return f"R$ {sinal}{inteiro:,}".replace(",", ".") + f",{resto:02d}"
@@ -0,0 +1,130 @@
+import os
+import re
+
+# Leitura dos XMLs de NF-e/NFC-e compartilhada pelas ferramentas (RT, pendentes,
+# NFC-e). Com lxml instalado o parse usa o libxml2 e as consultas viram XPath
+# compilados uma vez, no import; sem lxml (ou com FISCAI_XML=etree) tudo cai no
+# xml.etree.ElementTree, com os mesmos caminhos e o mesmo resultado.
+try:
+    if os.environ.get("FISCAI_XML", "").strip().lower() == "etree":
+        raise ImportError("FISCAI_XML=etree")
+    from lxml import etree
+except ImportError:
+    etree = None
+    import xml.etree.ElementTree as ET
+
+LXML = etree is not None
+NS = {"nfe": "http://www.portalfiscal.inf.br/nfe"}
+T = "{http://www.portalfiscal.inf.br/nfe}"
+
+if LXML:
+    # Sem entidades externas nem rede: o XML vem de upload
+    _PARSER = etree.XMLParser(resolve_entities=False, no_network=True, remove_comments=True)
+
+
+def ler(conteudo):
+    """Elemento raiz do XML em `conteudo` (bytes); levanta exceção se o XML for inválido."""
+    if LXML:
+        return etree.fromstring(conteudo, _PARSER)
+    return ET.fromstring(conteudo)
+
+
+def ler_ate(conteudo, tag, bloco=4096):
+    """Lê `conteudo` (bytes) em blocos só até fechar o primeiro elemento `tag` ("{ns}nome") e o devolve (ou None).
+
+    Para cabeçalhos (emit, ide) de notas grandes: o resto do documento não
+    chega a ser lido. Em notas pequenas `ler` inteiro sai mais barato.
+    """
+    if LXML:
+        parser = etree.XMLPullParser(events=("end",), tag=tag, resolve_entities=False, no_network=True)
+    else:
+        parser = ET.XMLPullParser(events=("end",))
+    for inicio in range(0, len(conteudo), bloco):
+        parser.feed(conteudo[inicio:inicio + bloco])
+        for _, elem in parser.read_events():
+            if elem.tag == tag:
+                return elem
+    return None
+
+
+def texto(caminho):
+    """Consulta compilada: texto do primeiro elemento em `caminho` ("" se não houver).
+
+    `caminho` usa o prefixo `nfe:` e a sintaxe comum ao XPath e ao
+    ElementPath (`nfe:ide/nfe:nNF`, `.//nfe:infProt/nfe:xMotivo`).
+    """
+    if LXML:
+        return etree.XPath(f"string({caminho})", namespaces=NS, smart_strings=False)
+    return lambda elem: elem.findtext(caminho, "", NS)
+
+
+def elementos(caminho):
+    """Consulta compilada: lista dos elementos em `caminho`."""
+    if LXML:
+        return etree.XPath(caminho, namespaces=NS)
+    return lambda elem: elem.findall(caminho, NS)
+
+
+def elemento(*caminhos):
+    """Consulta compilada: primeiro elemento do primeiro caminho que encontrar algo, ou None."""
+    consultas = [elementos(caminho) for caminho in caminhos]
+
+    def primeiro(elem):
+        for consulta in consultas:
+            encontrados = consulta(elem)
+            if encontrados:
+                return encontrados[0]
+        return None
+    return primeiro
+
+
+def filhos(elem):
+    """Mapa tag -> texto dos filhos diretos de `elem`, lido uma única vez ({} se None)."""
+    if elem is None:
+        return {}
+    return {filho.tag: filho.text or "" for filho in elem}
+
+
+# Grupos da nota usados pelas ferramentas. O infNFe fica sob a raiz NFe ou sob
+# nfeProc/NFe; a busca em toda a árvore fica só para layouts fora do padrão
+inf_nfe = elemento("nfe:NFe/nfe:infNFe", "nfe:infNFe", ".//nfe:infNFe")
+ide = elemento("nfe:ide")
+emit = elemento("nfe:emit")
+dest = elemento("nfe:dest")
+det = elementos("nfe:det")
+_PROD = T + "prod"
+_IMPOSTO = T + "imposto"
+
+
+def item(det):
+    """(campos de `prod`, {tag do imposto: campos}) de um `det`, numa única passada.
+
+    ICMS, PIS e COFINS trazem um único subgrupo (ICMS00, PISAliq...) e os
+    campos de cada imposto vêm dele.
+    """
+    produto, impostos = {}, {}
+    for filho in det:
+        if filho.tag == _PROD:
+            produto = filhos(filho)
+        elif filho.tag == _IMPOSTO:
+            for grupo in filho:
+                impostos[grupo.tag] = filhos(grupo[0]) if len(grupo) else {}
+    return produto, impostos
+
+
+_NAO_DIGITO = re.compile(r"\D")
+
+
+def formatar_documento(valor):
+    """Formata CPF (11 dígitos) ou CNPJ (14 dígitos); qualquer outro valor volta como veio.
+
+    Pontuação já presente é ignorada na contagem dos dígitos.
+    """
+    if not valor:
+        return valor
+    digitos = valor if valor.isdigit() else _NAO_DIGITO.sub("", valor)
+    if len(digitos) == 14:
+        return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+    if len(digitos) == 11:
+        return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+    return valor
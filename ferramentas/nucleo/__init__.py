@@ -0,0 +1,2 @@
+# Núcleo de extração e geração de relatórios de cada ferramenta, sem dependência do Streamlit.
+# Usado pelas telas em ferramentas/*.py e pela linha de comando (python -m ferramentas).
@@ -0,0 +1,111 @@
+import os
+import pandas as pd
+from ferramentas import medicao
+from ferramentas.moeda import centavos, reais
+
+COLUNAS = [
+    "Documento", "Descrição", "Cod_Item", "Nat_Receita", "Cód. STB",
+    "NCM", "CST_PIS", "CST_COFINS", "CFOP", "Qtde",
+    "Valor_Produto", "Desconto", "Valor_Total"
+]
+
+def formato_suportado(nome):
+    return nome.lower().endswith((".txt", ".html"))
+
+# Linhas lidas por bloco ao agregar um TXT; FISCAI_TXT_LINHAS ajusta o tamanho
+LINHAS_POR_BLOCO = int(os.environ.get("FISCAI_TXT_LINHAS", "200000"))
+# Cubo de totais: Valor_Total somado por estas chaves uma vez por upload; filtros e resumo
+# saem dele sem reler as linhas (custo pelo número de combinações, não de itens)
+CHAVES = ["Nat_Receita", "CST_PIS", "CST_COFINS", "CFOP", "Prefixo_NCM"]
+# Filtros oferecidos na tela e na CLI: coluna do cubo → rótulo
+FILTROS = {"CST_PIS": "CST_PIS", "CST_COFINS": "CST_COFINS", "CFOP": "CFOP", "Prefixo_NCM": "Capítulo NCM"}
+# O NCM entra no cubo só pelo capítulo (2 dígitos), para o cubo continuar pequeno
+DIGITOS_NCM = 2
+
+def ler_blocos(arquivo, linhas=None):
+    """Lê o TXT em blocos de `linhas`, só com as colunas do cubo e o Valor_Total (como texto)."""
+    return pd.read_csv(
+        arquivo, sep=",", header=None, names=COLUNAS, quotechar='"', encoding="utf-8",
+        usecols=["Nat_Receita", "NCM", "CST_PIS", "CST_COFINS", "CFOP", "Valor_Total"], dtype=str, chunksize=linhas or LINHAS_POR_BLOCO,
+    )
+
+def _somar(partes):
+    df = pd.concat(partes, ignore_index=True)
+    return df.groupby(CHAVES, dropna=False, sort=False)["Valor_Total"].sum().reset_index()
+
+def agregar_txt(arquivo, linhas=None, progresso=None):
+    """Lê um TXT em blocos e devolve (totais, linhas_invalidas).
+
+    `totais` tem o Valor_Total (em centavos) somado por `CHAVES`; cada bloco
+    é somado aos totais e descartado, então a memória depende do número de
+    combinações, não do tamanho do arquivo. `progresso(linhas_lidas)` é
+    chamado ao fim de cada bloco.
+    """
+    totais = None
+    invalidas = 0
+    lidas = 0
+    with medicao.etapa("agregar TXT", arquivos=1, bytes=medicao.tamanho(arquivo)):
+        for bloco in ler_blocos(arquivo, linhas):
+            # "R$ 1.234,56" → 123456 centavos; o que não for número vira <NA>
+            valores = centavos(bloco["Valor_Total"], decimal=",")
+            validos = valores.notna()
+            invalidas += int((~validos).sum())
+            parcial = bloco[validos].assign(Prefixo_NCM=bloco["NCM"].str[:DIGITOS_NCM], Valor_Total=valores)
+            parcial = parcial[CHAVES + ["Valor_Total"]]
+            totais = _somar([parcial] if totais is None else [totais, parcial])
+            lidas += len(bloco)
+            if progresso:
+                progresso(lidas)
+    return totais, invalidas
+
+def _inferir_tipo(serie):
+    # As chaves são lidas como texto; voltam ao tipo que o read_csv inferiria (ex.: "101" → 101)
+    try:
+        return pd.to_numeric(serie)
+    except (ValueError, TypeError):
+        return serie
+
+@medicao.medida("combinar totais")
+def combinar_totais(totais):
+    """Junta os totais de vários TXT no cubo (colunas de `CHAVES` e Valor_Total).
+
+    O cubo serve direto para `opcoes`, `filtrar` e `resumir`.
+    """
+    df = pd.concat(totais, ignore_index=True)
+    for chave in CHAVES:
+        # O capítulo do NCM fica como texto, preservando zeros à esquerda
+        if chave in COLUNAS:
+            df[chave] = _inferir_tipo(df[chave])
+    return _somar([df])
+
+def opcoes(cubo, coluna):
+    return sorted(cubo[coluna].astype(str).dropna().unique())
+
+@medicao.medida("filtrar")
+def filtrar(cubo, filtros):
+    """Filtra o cubo por {coluna: valores selecionados}; seleção vazia não filtra."""
+    manter = pd.Series(True, index=cubo.index)
+    for coluna, selecionados in filtros.items():
+        if selecionados:
+            manter &= cubo[coluna].astype(str).isin(selecionados)
+    return cubo[manter]
+
+@medicao.medida("resumir")
+def resumir(df_filtrado):
+    resumo = (
+        df_filtrado.groupby("Nat_Receita")["Valor_Total"]
+        .sum()
+        .reset_index()
+        .rename(columns={"Nat_Receita": "Cód. Nat Receita", "Valor_Total": "Total Valor Contábil"})
+    )
+    resumo["Total Valor Contábil"] = reais(resumo["Total Valor Contábil"])
+    return resumo
+
+def total_reais(cubo):
+    # Soma exata em centavos, convertida para reais só no fim
+    return int(cubo["Valor_Total"].sum()) / 100
+
+@medicao.medida("gerar planilha")
+def gerar_excel(resumo, destino):
+    with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+        resumo.to_excel(writer, index=False, sheet_name="Resumo")
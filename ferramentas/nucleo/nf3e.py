@@ -0,0 +1,134 @@
+import pdfplumber
+import hashlib
+import json
+import re
+import os
+import pandas as pd
+from io import BytesIO
+from ferramentas import medicao
+from ferramentas.cache_extracao import extrair_membros
+from ferramentas.planilha import gerar_relatorio
+from ferramentas.colunar import AcumuladorColunar, TEXTO, CATEGORIA, CENTAVOS_BR
+from ferramentas.moeda import em_reais
+
+SCHEMA = {
+    "Nota Fiscal": TEXTO, "Série": CATEGORIA, "CNPJ": CATEGORIA, "Valor (R$)": CENTAVOS_BR,
+    "Data de Emissão": TEXTO, "Nome do Destinatário": CATEGORIA, "Protocolo de Autorização": TEXTO,
+    "Unidade Consumidora": TEXTO, "Chave de Acesso": TEXTO
+}
+# Padrões de extração por layout (distribuidora); FISCAI_NF3E_LAYOUTS aponta para outro arquivo JSON
+CAMINHO_LAYOUTS = os.environ.get("FISCAI_NF3E_LAYOUTS") or os.path.join(os.path.dirname(__file__), "layouts_nf3e.json")
+# Campo interno com a UC impressa na conta, conferida contra o nome do arquivo
+UC_IMPRESSA = "UC Impressa"
+# Cada PDF segue como um lote próprio para o pool: o progresso avança arquivo a arquivo
+TAMANHO_LOTE_PDF = 1
+
+def carregar_layouts(caminho):
+    """Lê e compila os layouts do JSON uma única vez (por processo).
+
+    Cada layout traz `identificar` (regex buscado na 1ª página; null para o
+    layout padrão), `campos` ({campo: [regex, ...]}, valendo o primeiro
+    padrão que casar) e `opcionais` (campos que não seguram a leitura das
+    páginas nem entram no relatório de faltantes).
+    """
+    with open(caminho, "rb") as f:
+        bruto = f.read()
+    layouts = {}
+    for nome, layout in json.loads(bruto).items():
+        layouts[nome] = {
+            "nome": nome,
+            "identificar": re.compile(layout["identificar"]) if layout.get("identificar") else None,
+            "campos": {campo: [re.compile(p) for p in padroes] for campo, padroes in layout["campos"].items()},
+            "opcionais": frozenset(layout.get("opcionais", ())),
+        }
+    # A versão do cache acompanha o conteúdo dos layouts: editar um padrão invalida as extrações antigas
+    return layouts, hashlib.sha256(bruto).hexdigest()[:12]
+
+LAYOUTS, _DIGEST_LAYOUTS = carregar_layouts(CAMINHO_LAYOUTS)
+# Identificação no cache de extração; incrementar a versão ao mudar o que extrair_campos devolve
+EXTRATOR = "nf3e.extrair_campos"
+VERSAO_EXTRATOR = f"2-{_DIGEST_LAYOUTS}"
+
+def escolher_layout(texto):
+    for layout in LAYOUTS.values():
+        if layout["identificar"] and layout["identificar"].search(texto):
+            return layout
+    # Sem identificação, vale o layout padrão (sem `identificar`) ou, na falta dele, o primeiro do arquivo
+    padroes = [layout for layout in LAYOUTS.values() if layout["identificar"] is None]
+    return padroes[0] if padroes else next(iter(LAYOUTS.values()))
+
+def _buscar(padroes, texto):
+    for padrao in padroes:
+        match = padrao.search(texto)
+        if match:
+            return match.group(1).strip()
+    return None
+
+def extrair_campos(conteudo):
+    """Lê um PDF (bytes) e devolve (layout, campos, faltantes) — roda nos processos do pool.
+
+    As páginas são lidas em ordem e a leitura para assim que todos os campos
+    obrigatórios do layout foram encontrados (o cabeçalho fiscal fica na 1ª
+    página). Só os campos voltam ao processo principal e ficam no cache de
+    extração; a Unidade Consumidora vem do nome do arquivo, em `montar_linha`.
+    """
+    layout = None
+    campos = {}
+    partes = []
+    with pdfplumber.open(BytesIO(conteudo)) as pdf:
+        for page in pdf.pages:
+            partes.append(page.extract_text() + "\n")
+            texto = "".join(partes)
+            if layout is None:
+                layout = escolher_layout(texto)
+                pendentes = dict(layout["campos"])
+            for campo, padroes in list(pendentes.items()):
+                valor = _buscar(padroes, texto)
+                if valor is not None:
+                    campos[campo] = valor
+                    del pendentes[campo]
+            if pendentes.keys() <= layout["opcionais"]:
+                break
+    if layout is None:
+        layout = escolher_layout("")
+        pendentes = layout["campos"]
+    faltantes = [campo for campo in pendentes if campo not in layout["opcionais"]]
+    return layout["nome"], campos, faltantes
+
+def montar_linha(campos, nome, avisar=None):
+    # Completa a UC pelo nome do arquivo e avisa quando ela diverge da UC impressa no PDF
+    uc_arquivo = os.path.splitext(os.path.basename(nome))[0]
+    uc_conteudo = campos.get(UC_IMPRESSA)
+
+    if avisar and uc_conteudo and uc_conteudo != uc_arquivo:
+        avisar(f"⚠️ UC divergente: conteúdo do PDF → {uc_conteudo}, nome do arquivo → {uc_arquivo}")
+
+    return tuple(uc_arquivo if coluna == "Unidade Consumidora" else campos.get(coluna) for coluna in SCHEMA)
+
+def carregar(arquivos, cache=None, workers=None, avisar=None, progresso=None):
+    """Extrai os (nome, bytes) de `arquivos` em um pool de processos.
+
+    Devolve (df, df_faltantes): o DataFrame das notas e um relatório dos PDFs
+    com campos obrigatórios não encontrados. A ordem das linhas e dos avisos
+    de UC divergente (`avisar(mensagem)`) é a mesma dos arquivos de entrada.
+    `progresso(feitos, nome)` é chamado a cada PDF concluído.
+    """
+    dados_extraidos = AcumuladorColunar(SCHEMA)
+    faltantes = []
+    feitos = 0
+    with medicao.etapa("extrair PDF"):
+        for lote in extrair_membros(extrair_campos, medicao.iterar("ler arquivos", arquivos), cache, workers, TAMANHO_LOTE_PDF):
+            for nome, (layout, campos, campos_faltantes) in lote:
+                dados_extraidos.adicionar(montar_linha(campos, nome, avisar))
+                if campos_faltantes:
+                    faltantes.append((nome, layout, ", ".join(campos_faltantes)))
+                feitos += 1
+                if progresso:
+                    progresso(feitos, nome)
+    df_faltantes = pd.DataFrame(faltantes, columns=["Arquivo", "Layout", "Campos não encontrados"])
+    # "Valor (R$)" é convertido em bloco para centavos pelo schema e exibido em reais
+    return em_reais(dados_extraidos.para_dataframe(), ["Valor (R$)"]), df_faltantes
+
+def gerar_planilha(df, destino):
+    # Chave de Acesso como texto, para o Excel não converter os 44 dígitos em número
+    gerar_relatorio(destino, df, "Notas Fiscais", {"Chave de Acesso": "@"}, congelar_cabecalho=True, grade=False)
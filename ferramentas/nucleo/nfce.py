@@ -0,0 +1,528 @@
+import pandas as pd
+import numpy as np
+import xlsxwriter
+from ferramentas import medicao, nfe_xml
+from ferramentas.cache_extracao import extrair_membros
+from ferramentas.planilha import escrever_aba as escrever_planilha
+from ferramentas.colunar import AcumuladorColunar, TabelaEmBlocos, LIMITE_MEMORIA_MB, blocos, TEXTO, CATEGORIA, INTEIRO, DECIMAL, CENTAVOS, DATA
+from ferramentas.moeda import reais, em_reais, formatar
+from ferramentas.nfe_xml import T as _T, filhos, formatar_documento
+
+# Identificação no cache de extração; incrementar a versão ao mudar o que extrair_conteudo devolve
+EXTRATOR = "nfce.extrair_conteudo"
+VERSAO_EXTRATOR = 2
+# Linhas de itens convertidas por vez (ver AcumuladorColunar); também limita as strings brutas pendentes
+_LINHAS_POR_BLOCO = 50_000
+
+# Consultas compiladas uma vez (XPath no lxml); ver ferramentas.nfe_xml
+_CH_NFE = nfe_xml.texto(".//nfe:chNFe")
+_CNPJ_EVENTO = nfe_xml.texto(".//nfe:CNPJ")
+_DH_EVENTO = nfe_xml.texto(".//nfe:dhEvento")
+_UF_DEST = nfe_xml.texto("nfe:enderDest/nfe:UF")
+_V_NF = nfe_xml.texto("nfe:total/nfe:ICMSTot/nfe:vNF")
+_T_PAG = nfe_xml.texto("nfe:pag/nfe:detPag/nfe:tPag")
+_ICMS, _PIS, _COFINS = _T + "ICMS", _T + "PIS", _T + "COFINS"
+
+def extrair_nfce(root):
+    """Percorre o XML uma única vez e devolve (dado, itens).
+
+    `dado` alimenta a aba Dados_NFC-e e `itens` traz uma linha por `det`,
+    já com a Chave_Acesso da nota; todas as demais abas derivam dos itens.
+    Eventos de cancelamento não têm itens.
+    """
+    if root.tag.endswith("procEventoNFe"):
+        chave = _CH_NFE(root)
+        numero_doc = chave[25:34] if chave else None
+        serie = chave[22:25] if chave and len(chave) >= 25 else ""
+        dado = {
+            "Número_Doc": int(numero_doc),
+            "Chave_Acesso": str(chave).zfill(44),
+            "Situação_do_Documento": "Cancelamento de NF-e homologado",
+            "Modelo": "65",
+            "CNPJ_Emissor": formatar_documento(_CNPJ_EVENTO(root)),
+            "CPF_CNPJ_Destinatário": "",
+            "UF_Destinatário": "",
+            "Valor_Total": "0",
+            "Data_de_Emissão": _DH_EVENTO(root),
+            "Serie": serie
+        }
+        return dado, []
+
+    infNFe = nfe_xml.inf_nfe(root)
+    dest = nfe_xml.dest(infNFe)
+
+    d_ide = filhos(nfe_xml.ide(infNFe))
+    d_emit = filhos(nfe_xml.emit(infNFe))
+    d_dest = filhos(dest)
+
+    numero_doc = d_ide.get(_T + "nNF", "")
+    serie = d_ide.get(_T + "serie", "")
+    dhEmi = d_ide.get(_T + "dhEmi", "")
+    chave = infNFe.get("Id", "").replace("NFe", "").zfill(44)
+    cnpj_emit = d_emit.get(_T + "CNPJ", "")
+    cnpj_dest = d_dest.get(_T + "CNPJ") or d_dest.get(_T + "CPF", "")
+    uf_dest = _UF_DEST(dest) if d_dest else ""
+
+    dado = {
+        "Número_Doc": int(numero_doc),
+        "Chave_Acesso": chave,
+        "Situação_do_Documento": "Autorizado",
+        "Modelo": d_ide.get(_T + "mod", ""),
+        "CNPJ_Emissor": formatar_documento(cnpj_emit),
+        "CPF_CNPJ_Destinatário": formatar_documento(cnpj_dest),
+        "UF_Destinatário": uf_dest,
+        "Valor_Total": _V_NF(infNFe) or "0",
+        "Data_de_Emissão": dhEmi[:10] or None,
+        "Serie": serie
+    }
+
+    # Campos de cabeçalho repetidos em cada linha da aba XML_Completo
+    cNF = d_ide.get(_T + "cNF", "")
+    emit_xfant = d_emit.get(_T + "xFant", "")
+    dest_cpf_cnpj = (d_dest.get(_T + "CPF") or d_dest.get(_T + "CNPJ")) if dest is not None else ""
+    dest_xnome = d_dest.get(_T + "xNome", "")
+    tPag = _T_PAG(infNFe)
+    itens = []
+    for det in nfe_xml.det(infNFe):
+        p, impostos = nfe_xml.item(det)
+        c_icms = impostos.get(_ICMS, {})
+        c_pis = impostos.get(_PIS, {})
+        c_cofins = impostos.get(_COFINS, {})
+
+        itens.append({
+            "nNF": numero_doc, "serie": serie, "dhEmi": dhEmi, "cNF": cNF,
+            "emit_CNPJ": cnpj_emit, "emit_xFant": emit_xfant,
+            "dest_CPF_CNPJ": dest_cpf_cnpj, "dest_xNome": dest_xnome,
+            "cProd": p.get(_T + "cProd", ""),
+            "cEAN": p.get(_T + "cEAN", ""),
+            "xProd": p.get(_T + "xProd", ""),
+            "NCM": p.get(_T + "NCM", ""),
+            "CFOP": p.get(_T + "CFOP", ""),
+            "uCom": p.get(_T + "uCom", ""),
+            "qCom": p.get(_T + "qCom", ""),
+            "vUnCom": p.get(_T + "vUnCom", ""),
+            "vDesc": p.get(_T + "vDesc", ""),
+            "vProd": p.get(_T + "vProd", ""),
+            "uTrib": p.get(_T + "uTrib", ""),
+            "qTrib": p.get(_T + "qTrib", ""),
+            "vUnTrib": p.get(_T + "vUnTrib", ""),
+            "ICMS_orig": c_icms.get(_T + "orig", ""),
+            # Sem CST (ex.: grupos ICMSSN) fica vazio e forma um grupo próprio no Resumo CFOP
+            "ICMS_CST": c_icms.get(_T + "CST"),
+            "ICMS_vBC": c_icms.get(_T + "vBC", ""),
+            "ICMS_pICMS": c_icms.get(_T + "pICMS", ""),
+            "ICMS_vICMS": c_icms.get(_T + "vICMS", ""),
+            "PIS_CST": c_pis.get(_T + "CST", ""),
+            "PIS_vBC": c_pis.get(_T + "vBC", ""),
+            "PIS_pPIS": c_pis.get(_T + "pPIS", ""),
+            "PIS_vPIS": c_pis.get(_T + "vPIS", ""),
+            "COFINS_CST": c_cofins.get(_T + "CST", ""),
+            "COFINS_vBC": c_cofins.get(_T + "vBC", ""),
+            "COFINS_pCOFINS": c_cofins.get(_T + "pCOFINS", ""),
+            "COFINS_vCOFINS": c_cofins.get(_T + "vCOFINS", ""),
+            "pag_tPag": tPag,
+            # pRedBC (redução da base de cálculo do ICMS) vem do próprio subgrupo (ICMS20, ICMS70...)
+            "pRedBC": c_icms.get(_T + "pRedBC", ""),
+            "Chave_Acesso": chave
+        })
+    return dado, itens
+
+# Schemas das linhas emitidas por extrair_nfce (mesma ordem dos dicts)
+SCHEMA_DADOS = {
+    "Número_Doc": INTEIRO, "Chave_Acesso": TEXTO, "Situação_do_Documento": CATEGORIA,
+    "Modelo": CATEGORIA, "CNPJ_Emissor": CATEGORIA, "CPF_CNPJ_Destinatário": TEXTO,
+    "UF_Destinatário": CATEGORIA, "Valor_Total": CENTAVOS, "Data_de_Emissão": DATA, "Serie": TEXTO
+}
+SCHEMA_ITENS = {
+    "nNF": TEXTO, "serie": CATEGORIA, "dhEmi": DATA, "cNF": TEXTO,
+    "emit_CNPJ": CATEGORIA, "emit_xFant": CATEGORIA, "dest_CPF_CNPJ": TEXTO, "dest_xNome": TEXTO,
+    "cProd": TEXTO, "cEAN": CATEGORIA, "xProd": TEXTO, "NCM": CATEGORIA, "CFOP": CATEGORIA,
+    "uCom": CATEGORIA, "qCom": TEXTO, "vUnCom": DECIMAL, "vDesc": CENTAVOS, "vProd": CENTAVOS,
+    "uTrib": CATEGORIA, "qTrib": TEXTO, "vUnTrib": DECIMAL,
+    "ICMS_orig": CATEGORIA, "ICMS_CST": CATEGORIA, "ICMS_vBC": CENTAVOS, "ICMS_pICMS": DECIMAL, "ICMS_vICMS": CENTAVOS,
+    "PIS_CST": CATEGORIA, "PIS_vBC": CENTAVOS, "PIS_pPIS": DECIMAL, "PIS_vPIS": CENTAVOS,
+    "COFINS_CST": CATEGORIA, "COFINS_vBC": CENTAVOS, "COFINS_pCOFINS": DECIMAL, "COFINS_vCOFINS": CENTAVOS,
+    "pag_tPag": CATEGORIA, "pRedBC": CATEGORIA, "Chave_Acesso": CATEGORIA
+}
+
+# Renomear colunas para nomes mais legíveis
+COLUNAS_LEGIVEIS = {
+    "nNF": "Número NF",
+    "serie": "Série",
+    "dhEmi": "Data de Emissão",
+    "cNF": "CNF",
+    "emit_CNPJ": "CNPJ Emitente",
+    "emit_xFant": "Nome Fantasia Emitente",
+    "dest_CPF_CNPJ": "CPF/CNPJ Destinatário",
+    "dest_xNome": "Nome Destinatário",
+    "cProd": "Código Produto",
+    "cEAN": "EAN",
+    "xProd": "Descrição Produto",
+    "NCM": "NCM",
+    "CFOP": "CFOP",
+    "uCom": "Unidade Comercial",
+    "qCom": "Quantidade Comercial",
+    "vUnCom": "Valor Unitário Comercial",
+    "vDesc": "Valor Desconto",
+    "vProd": "Valor Produto",
+    "uTrib": "Unidade Tributável",
+    "qTrib": "Quantidade Tributável",
+    "vUnTrib": "Valor Unitário Tributável",
+    "ICMS_orig": "Origem ICMS",
+    "ICMS_CST": "CST ICMS",
+    "ICMS_vBC": "Base de Cálculo ICMS",
+    "ICMS_pICMS": "Alíquota ICMS (%)",
+    "ICMS_vICMS": "Valor ICMS",
+    "PIS_CST": "CST PIS",
+    "PIS_vBC": "Base de Cálculo PIS",
+    "PIS_pPIS": "Alíquota PIS (%)",
+    "PIS_vPIS": "Valor PIS",
+    "COFINS_CST": "CST COFINS",
+    "COFINS_vBC": "Base de Cálculo COFINS",
+    "COFINS_pCOFINS": "Alíquota COFINS (%)",
+    "COFINS_vCOFINS": "Valor COFINS",
+    "pag_tPag": "Tipo de Pagamento",
+    "pRedBC": "Redução_BC_%"
+}
+COLUNAS_VALORES = [
+    "Valor Produto", "Valor Desconto", "Valor Unitário Comercial", "Valor Unitário Tributável",
+    "Base de Cálculo ICMS", "Valor ICMS",
+    "Base de Cálculo PIS", "Valor PIS",
+    "Base de Cálculo COFINS", "Valor COFINS"
+]
+# Valores em centavos (int64) até a montagem das abas; os unitários têm mais casas e seguem em float
+COLUNAS_CENTAVOS = [
+    "Valor Produto", "Valor Desconto",
+    "Base de Cálculo ICMS", "Valor ICMS",
+    "Base de Cálculo PIS", "Valor PIS",
+    "Base de Cálculo COFINS", "Valor COFINS"
+]
+COLUNAS_ALIQUOTAS = ["Alíquota ICMS (%)", "Alíquota PIS (%)", "Alíquota COFINS (%)"]
+COLUNAS_RESUMO_NF = [
+    "Número NF", "Série", "Valor Produto", "Valor Desconto", "Valor Líquido",
+    "Base de Cálculo ICMS", "Valor ICMS",
+    "Valor PIS", "Base de Cálculo PIS",
+    "Valor COFINS", "Base de Cálculo COFINS"
+]
+COLUNAS_RESUMO_PRODUTOS = [
+    "Cod_Produto", "Descrição_Produto", "NCM", "Quantidade", "Valor_Unitario", "Valor_Total",
+    "CST_ICMS", "Base_Calculo", "Aliquota_ICMS_(%)", "Valor_ICMS"
+]
+
+def extrair_conteudo(conteudo):
+    """Extrai um XML (bytes) e devolve (dado, itens) como tuplas, ou None se inválido.
+
+    As colunas seguem a ordem de SCHEMA_DADOS e SCHEMA_ITENS; o resultado é
+    o que fica guardado no cache de extração.
+    """
+    try:
+        dado, itens_nota = extrair_nfce(nfe_xml.ler(conteudo))
+    except Exception:
+        return None
+    return tuple(dado.values()), [tuple(item.values()) for item in itens_nota]
+
+def indexar_chaves(df_dados):
+    """Resolve os eventos de cancelamento contra o índice de chaves de acesso.
+
+    Devolve o df_dados sem as autorizações canceladas (os eventos continuam
+    na aba) e o Index das chaves autorizadas e não canceladas, usado para
+    filtrar os itens uma única vez.
+    """
+    autorizada = (df_dados["Situação_do_Documento"] == "Autorizado").to_numpy()
+    canceladas = pd.Index(df_dados["Chave_Acesso"].to_numpy()[~autorizada]).unique()
+    cancelada = df_dados["Chave_Acesso"].isin(canceladas).to_numpy()
+    validas = pd.Index(df_dados["Chave_Acesso"].to_numpy()[autorizada & ~cancelada]).unique()
+    return df_dados[~(autorizada & cancelada)], validas
+
+def preparar_dados(df_dados):
+    df_dados["Data_de_Emissão"] = df_dados["Data_de_Emissão"].dt.strftime("%d-%m-%Y")
+    df_dados["Serie"] = df_dados["Serie"].fillna("").astype(str).str.zfill(3).str.strip()
+    df_dados["Valor_Total"] = reais(df_dados["Valor_Total"])
+    return df_dados.sort_values(by=["Serie", "Número_Doc"]).reset_index(drop=True)
+
+def preparar_itens(df_itens):
+    # Bloco de itens com nomes legíveis, datas e documentos formatados
+    df_itens = df_itens.rename(columns=COLUNAS_LEGIVEIS)
+    # Ajustar coluna de data para formato dd/mm/yyyy
+    df_itens["Data de Emissão"] = df_itens["Data de Emissão"].dt.strftime("%d/%m/%Y")
+    df_itens["CNPJ Emitente"] = df_itens["CNPJ Emitente"].map(formatar_documento, na_action="ignore")
+    df_itens["CPF/CNPJ Destinatário"] = df_itens["CPF/CNPJ Destinatário"].map(formatar_documento, na_action="ignore")
+    # Valores chegam em centavos, unitários e alíquotas em float64; ausentes viram 0 para soma/média no Excel
+    for col in COLUNAS_CENTAVOS:
+        df_itens[col] = df_itens[col].fillna(0).astype("int64")
+    for col in COLUNAS_VALORES + COLUNAS_ALIQUOTAS:
+        if col not in COLUNAS_CENTAVOS:
+            df_itens[col] = df_itens[col].replace([np.nan, np.inf, -np.inf], 0)
+    return df_itens.reset_index(drop=True)
+
+# Os resumos saem de somas parciais por bloco de itens (_parcial_*), juntadas
+# no fim (_fechar_*): os itens não precisam estar todos em memória
+
+_CHAVES_CFOP = ["CST", "CFOP", "Alíquota"]
+_VALORES_CFOP = ["Valor Total", "Base de Cálculo", "ICMS"]
+
+def _parcial_cfop(itens):
+    base = pd.DataFrame({
+        "CST": itens["CST ICMS"],
+        "CFOP": itens["CFOP"],
+        "Alíquota": itens["Alíquota ICMS (%)"],
+        "Valor Total": itens["Valor Produto"] - itens["Valor Desconto"],
+        "Base de Cálculo": itens["Base de Cálculo ICMS"],
+        "ICMS": itens["Valor ICMS"]
+    })
+    return base.groupby(_CHAVES_CFOP, dropna=False, observed=True)[_VALORES_CFOP].sum().reset_index()
+
+def _fechar_cfop(parciais):
+    # Agrupa pela alíquota numérica e formata só as chaves já agrupadas; as somas ficam em centavos
+    agrupado = _juntar(parciais, _CHAVES_CFOP).groupby(_CHAVES_CFOP, dropna=False, observed=True)[_VALORES_CFOP].sum().reset_index()
+    agrupado["Alíquota"] = agrupado["Alíquota"].map("{:.2f}".format)
+    return em_reais(agrupado.groupby(_CHAVES_CFOP, dropna=False, observed=True)[_VALORES_CFOP].sum().reset_index(), _VALORES_CFOP)
+
+def montar_resumo_cfop(itens):
+    return _fechar_cfop([_parcial_cfop(itens)])
+
+_CHAVES_NF = ["Número NF", "Série"]
+_VALORES_NF = [
+    "Valor Produto", "Valor Desconto", "Valor ICMS", "Valor PIS", "Valor COFINS",
+    "Base de Cálculo ICMS", "Base de Cálculo PIS", "Base de Cálculo COFINS"
+]
+
+def _parcial_nf(itens):
+    return itens.groupby(_CHAVES_NF, dropna=False, observed=True)[_VALORES_NF].sum().reset_index()
+
+def _fechar_nf(parciais):
+    resumo_nf = _juntar(parciais, _CHAVES_NF)
+    if resumo_nf.empty:
+        return pd.DataFrame(columns=COLUNAS_RESUMO_NF)
+    resumo_nf = resumo_nf.groupby(_CHAVES_NF, dropna=False, observed=True)[_VALORES_NF].sum().reset_index()
+    resumo_nf["Valor Líquido"] = resumo_nf["Valor Produto"] - resumo_nf["Valor Desconto"]
+    resumo_nf = em_reais(resumo_nf[COLUNAS_RESUMO_NF], COLUNAS_CENTAVOS + ["Valor Líquido"])
+    # Ordenar por Série crescente e Número NF crescente
+    return resumo_nf.sort_values(by=["Série", "Número NF"]).reset_index(drop=True)
+
+def montar_resumo_nf(itens):
+    return _fechar_nf([_parcial_nf(itens)])
+
+_CHAVES_PRODUTO = ["Código Produto", "Descrição Produto", "NCM"]
+_SOMAS_PRODUTO = ["Valor Produto", "Valor ICMS", "Base de Cálculo ICMS", "Quantidade Comercial"]
+# Colunas resumidas pelo valor mais frequente do produto (no empate, o menor)
+_MODAS_PRODUTO = ["CST ICMS", "Alíquota ICMS (%)"]
+
+def _parcial_produtos(itens):
+    """(somas, primeiro valor unitário, contagens de cada CST/alíquota) por produto de um bloco de itens."""
+    base = itens[_CHAVES_PRODUTO + _SOMAS_PRODUTO[:3] + ["Valor Unitário Comercial"] + _MODAS_PRODUTO].assign(**{
+        "Quantidade Comercial": pd.to_numeric(itens["Quantidade Comercial"], errors="coerce"),
+        "Valor Unitário Comercial": pd.to_numeric(itens["Valor Unitário Comercial"], errors="coerce"),
+    })
+    somas = base.groupby(_CHAVES_PRODUTO, dropna=False, observed=True)[_SOMAS_PRODUTO].sum().reset_index()
+    primeiros = base.drop_duplicates(_CHAVES_PRODUTO)[_CHAVES_PRODUTO + ["Valor Unitário Comercial"]]
+    contagens = {
+        col: base.dropna(subset=[col]).groupby(_CHAVES_PRODUTO + [col], dropna=False, observed=True)
+        .size().rename("Ocorrências").reset_index()
+        for col in _MODAS_PRODUTO
+    }
+    return somas, primeiros, contagens
+
+def _fechar_produtos(parciais):
+    somas = _juntar([parcial[0] for parcial in parciais], _CHAVES_PRODUTO)
+    if somas.empty:
+        return pd.DataFrame(columns=COLUNAS_RESUMO_PRODUTOS)
+    resumo_produtos = somas.groupby(_CHAVES_PRODUTO, dropna=False)[_SOMAS_PRODUTO].sum().reset_index()
+    # Valor unitário do primeiro item do produto, na ordem de extração
+    primeiros = _juntar([parcial[1] for parcial in parciais], _CHAVES_PRODUTO).drop_duplicates(_CHAVES_PRODUTO)
+    resumo_produtos = resumo_produtos.merge(primeiros, on=_CHAVES_PRODUTO, how="left")
+    for col in _MODAS_PRODUTO:
+        contagens = _juntar([parcial[2][col] for parcial in parciais], _CHAVES_PRODUTO)
+        contagens = contagens.groupby(_CHAVES_PRODUTO + [col], dropna=False)["Ocorrências"].sum().reset_index()
+        modas = (contagens.sort_values(_CHAVES_PRODUTO + ["Ocorrências", col], ascending=[True] * 3 + [False, True])
+                 .drop_duplicates(_CHAVES_PRODUTO)[_CHAVES_PRODUTO + [col]])
+        resumo_produtos = resumo_produtos.merge(modas, on=_CHAVES_PRODUTO, how="left")
+        # Produto sem nenhum valor na coluna fica vazio
+        if resumo_produtos[col].hasnans:
+            resumo_produtos[col] = resumo_produtos[col].astype(object).where(resumo_produtos[col].notna(), "")
+    rename_dict = {
+        "Código Produto": "Cod_Produto",
+        "Descrição Produto": "Descrição_Produto",
+        "NCM": "NCM",
+        "Quantidade Comercial": "Quantidade",
+        "Valor Unitário Comercial": "Valor_Unitario",
+        "Valor Produto": "Valor_Total",
+        "Valor ICMS": "Valor_ICMS",
+        "Base de Cálculo ICMS": "Base_Calculo",
+        "CST ICMS": "CST_ICMS",
+        "Alíquota ICMS (%)": "Aliquota_ICMS_(%)"
+    }
+    resumo_produtos = resumo_produtos.rename(columns=rename_dict)[COLUNAS_RESUMO_PRODUTOS]
+    try:
+        resumo_produtos = resumo_produtos.sort_values(by="Cod_Produto", key=lambda x: pd.to_numeric(x, errors="coerce")).reset_index(drop=True)
+    except Exception:
+        resumo_produtos = resumo_produtos.sort_values(by="Cod_Produto").reset_index(drop=True)
+    # Formatar colunas de valores como moeda brasileira com duas casas decimais (não formata Redução_BC_%)
+    for col in ["Valor_Total", "Base_Calculo", "Valor_ICMS"]:
+        resumo_produtos[col] = resumo_produtos[col].map(formatar)
+    resumo_produtos["Valor_Unitario"] = resumo_produtos["Valor_Unitario"].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notnull(x) else "")
+    return resumo_produtos
+
+def montar_resumo_produtos(itens):
+    return _fechar_produtos([_parcial_produtos(itens)])
+
+def _juntar(parciais, chaves):
+    # Parciais de blocos diferentes têm categorias diferentes; as chaves seguem como texto/número comum
+    return pd.concat(
+        [parcial.astype({chave: object for chave in chaves if isinstance(parcial[chave].dtype, pd.CategoricalDtype)})
+         for parcial in parciais],
+        ignore_index=True,
+    )
+
+def detectar_quebras(series, numeros):
+    """Quebras de numeração e números duplicados por série, sem laço em Python.
+
+    Ordena (série, número) uma única vez e compara vizinhos com `np.diff`.
+    Cada quebra vira uma linha com o intervalo faltante (primeiro, último e
+    quantidade); cada número repetido vira uma linha de "Duplicidade" com a
+    quantidade de ocorrências.
+    """
+    validos = numeros.notna().to_numpy()
+    codigos, rotulos = pd.factorize(series[validos], sort=True)
+    numeros = numeros[validos].to_numpy(dtype="int64")
+    ordem = np.lexsort((numeros, codigos))
+    codigos, numeros = codigos[ordem], numeros[ordem]
+
+    mesma_serie = codigos[1:] == codigos[:-1]
+    passo = np.diff(numeros)
+    quebra = np.flatnonzero(mesma_serie & (passo > 1))
+    anterior, atual = numeros[quebra], numeros[quebra + 1]
+    quebras = pd.DataFrame({
+        "Série": rotulos[codigos[quebra]],
+        "Número_Anterior": anterior,
+        "Número_Atual": atual,
+        "Primeiro_Faltante": pd.array(anterior + 1, dtype="Int64"),
+        "Último_Faltante": pd.array(atual - 1, dtype="Int64"),
+        "Quantidade": atual - anterior - 1,
+        "Ocorrência": "Quebra"
+    })
+
+    # Em cada sequência de repetidos, o primeiro vizinho igual marca o número e a contagem sai de np.unique
+    repetido = np.flatnonzero(mesma_serie & (passo == 0)) + 1
+    pares, contagem = np.unique(
+        np.stack([codigos[repetido], numeros[repetido]], axis=1).reshape(-1, 2), axis=0, return_counts=True
+    )
+    duplicados = pd.DataFrame({
+        "Série": rotulos[pares[:, 0]],
+        "Número_Anterior": pares[:, 1],
+        "Número_Atual": pares[:, 1],
+        "Primeiro_Faltante": pd.array([pd.NA] * len(pares), dtype="Int64"),
+        "Último_Faltante": pd.array([pd.NA] * len(pares), dtype="Int64"),
+        "Quantidade": contagem + 1,
+        "Ocorrência": "Duplicidade"
+    })
+    return (
+        pd.concat([quebras, duplicados], ignore_index=True)
+        .sort_values(["Série", "Número_Anterior", "Ocorrência"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+def carregar(membros, cache=None, workers=None, limite_mb=None, pasta=None):
+    """Extrai os (nome, bytes) de `membros` e devolve (df_dados, itens, df_status) já preparados.
+
+    Os itens ficam em blocos já preparados (TabelaEmBlocos): passando de
+    `limite_mb` (padrão FISCAI_MEMORIA_MB) os blocos vão para Parquet
+    temporário em `pasta` e são relidos um por vez. Quem recebe
+    os itens chama `fechar()` (ou usa `with`) para apagar esses arquivos.
+    """
+    dados = AcumuladorColunar(SCHEMA_DADOS)
+    # Cada bloco de itens já é preparado (nomes, datas, documentos) ao ser fechado; o filtro das chaves vem no fim
+    itens = AcumuladorColunar(SCHEMA_ITENS, _LINHAS_POR_BLOCO, limite_mb or LIMITE_MEMORIA_MB, pasta, preparar_itens)
+    status = []
+
+    try:
+        with medicao.etapa("extrair XML"):
+            for lote in extrair_membros(extrair_conteudo, medicao.iterar("ler arquivos", membros), cache, workers):
+                for nome, registro in lote:
+                    if registro is None:
+                        status.append((nome, "ERRO"))
+                        continue
+                    dados.adicionar(registro[0])
+                    itens.estender(registro[1])
+                    status.append((nome, "OK"))
+
+        # Um único índice de chaves decide o que é válido; todas as abas de itens saem dos mesmos blocos filtrados
+        with medicao.etapa("montar tabelas"):
+            itens.concluir()
+            df_dados, chaves_validas = indexar_chaves(dados.para_dataframe())
+            df_dados = preparar_dados(df_dados)
+            df_status = pd.DataFrame(status, columns=["Arquivo_XML", "Progresso"])
+    except BaseException:
+        itens.fechar()
+        raise
+    df_itens = TabelaEmBlocos(itens, lambda bloco: bloco[bloco["Chave_Acesso"].isin(chaves_validas)].reset_index(drop=True))
+    return df_dados, df_itens, df_status
+
+@medicao.medida("montar resumos")
+def montar_abas(df_dados, df_itens, df_status):
+    """Devolve {nome da aba: DataFrame ou TabelaEmBlocos}, na ordem da planilha.
+
+    `df_itens` (DataFrame ou TabelaEmBlocos) é percorrido uma vez para os
+    resumos; a aba XML_Completo continua em blocos e é lida de novo ao gravar.
+    """
+    parciais_cfop, parciais_nf, parciais_produtos = [], [], []
+    for bloco in blocos(df_itens):
+        parciais_cfop.append(_parcial_cfop(bloco))
+        parciais_nf.append(_parcial_nf(bloco))
+        parciais_produtos.append(_parcial_produtos(bloco))
+    return {
+        "Dados_NFC-e": df_dados,
+        "Resumo CFOP": _fechar_cfop(parciais_cfop),
+        "Resumo_NFC-e": _fechar_nf(parciais_nf),
+        "Resumo_Produtos": _fechar_produtos(parciais_produtos),
+        "XML_Completo": TabelaEmBlocos(df_itens, lambda bloco: em_reais(bloco, COLUNAS_CENTAVOS)),
+        "Sequência": detectar_quebras(df_dados["Serie"], df_dados["Número_Doc"]),
+        "Status": df_status,
+    }
+
+@medicao.medida("gerar planilha")
+def gerar_planilha(abas, destino):
+    """Grava as abas de `montar_abas` em `destino` (caminho ou buffer) com xlsxwriter.
+
+    Em modo constant_memory: cada linha vai para o disco ao ser escrita e
+    as abas em blocos são gravadas um bloco por vez.
+    """
+    wb = xlsxwriter.Workbook(destino, {"constant_memory": True})
+    try:
+        header_format = wb.add_format({'bold': True, 'bg_color': '#333333', 'font_color': 'white', 'align': 'center'})
+        moeda = wb.add_format({'num_format': 'R$ #,##0.00', 'align': 'center'})
+        texto = wb.add_format({'align': 'center'})
+        vermelho = wb.add_format({'font_color': 'red', 'align': 'center'})
+        vermelho_moeda = wb.add_format({'font_color': 'red', 'bold': True, 'num_format': 'R$ #,##0.00', 'align': 'center'})
+
+        esquerda = wb.add_format({'align': 'left'})
+        colunas_moeda = {
+            "XML_Completo": COLUNAS_VALORES,
+            # Formatação monetária para Resumo_NFC-e (mantém igual ao Resumo_NF)
+            "Resumo_NFC-e": [
+                "Valor Produto", "Valor Desconto", "Valor Líquido",
+                "Valor ICMS", "Base de Cálculo ICMS",
+                "Valor PIS", "Base de Cálculo PIS",
+                "Valor COFINS", "Base de Cálculo COFINS"
+            ],
+        }
+
+        def formato_coluna(nome, col):
+            # Alinha à esquerda a coluna Descrição_Produto na aba Resumo_Produtos
+            if nome == "Resumo_Produtos" and col == "Descrição_Produto":
+                return esquerda
+            if col in colunas_moeda.get(nome, []):
+                return moeda
+            return moeda if col in ["Valor_Total", "Valor Total", "Base de Cálculo", "ICMS"] else texto
+
+        def escrever_aba(df, nome, colorir_cancelada=False):
+            destaque = formatos_destaque = None
+            if colorir_cancelada and "Situação_do_Documento" in df.columns:
+                destaque = lambda bloco: (bloco["Situação_do_Documento"] == "Cancelamento de NF-e homologado").to_numpy()
+                formatos_destaque = lambda col: vermelho_moeda if col == "Valor_Total" else vermelho
+            escrever_planilha(wb, df, nome, header_format, lambda col: formato_coluna(nome, col), destaque, formatos_destaque)
+
+        for nome, df in abas.items():
+            escrever_aba(df, nome, colorir_cancelada=nome == "Dados_NFC-e")
+    finally:
+        wb.close()
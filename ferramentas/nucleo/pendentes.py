@@ -0,0 +1,83 @@
+from ferramentas import medicao, nfe_xml
+from ferramentas.cache_extracao import extrair_membros
+from ferramentas.planilha import gerar_relatorio
+from ferramentas.colunar import AcumuladorColunar, TEXTO, CATEGORIA, CENTAVOS, DATA
+from ferramentas.moeda import reais
+from ferramentas.nfe_xml import formatar_documento
+
+SCHEMA = {
+    "Número NF": TEXTO, "CNPJ Emitente": TEXTO, "Nome Emitente": TEXTO, "Data Emissão": DATA,
+    "Valor NF": CENTAVOS, "Status NF": CATEGORIA, "Produtos": TEXTO, "Observações": TEXTO
+}
+# Identificação no cache de extração; incrementar a versão ao mudar o que extrair_linha devolve
+EXTRATOR = "pendentes.extrair_linha"
+VERSAO_EXTRATOR = 2
+
+# Consultas compiladas uma vez (XPath no lxml); ver ferramentas.nfe_xml
+_N_NF = nfe_xml.texto("nfe:ide/nfe:nNF")
+_DH_EMI = nfe_xml.texto("nfe:ide/nfe:dhEmi")
+_CNPJ_EMIT = nfe_xml.texto("nfe:emit/nfe:CNPJ")
+_NOME_EMIT = nfe_xml.texto("nfe:emit/nfe:xNome")
+_V_NF = nfe_xml.texto("nfe:total/nfe:ICMSTot/nfe:vNF")
+_X_MOTIVO = nfe_xml.texto("nfe:protNFe/nfe:infProt/nfe:xMotivo")
+_X_PROD = nfe_xml.elementos("nfe:det/nfe:prod/nfe:xProd")
+
+def extrair_dados_xml(conteudo):
+    try:
+        root = nfe_xml.ler(conteudo)
+        # Campos da nota partem do infNFe; o protocolo (xMotivo) fica ao lado da NFe, no nfeProc
+        infNFe = nfe_xml.inf_nfe(root)
+        nota = infNFe if infNFe is not None else root
+
+        nNF = _N_NF(nota)
+        # Data e valor seguem como texto bruto; a conversão é feita em bloco pelo AcumuladorColunar
+        dhEmi = _DH_EMI(nota)
+
+        cnpj_emit = _CNPJ_EMIT(nota)
+        nome_emit = _NOME_EMIT(nota)
+        vNF = _V_NF(nota)
+        xMotivo = _X_MOTIVO(root)
+
+        produtos = [prod.text or "" for prod in _X_PROD(nota)]
+        mais_de_tres = len(produtos) > 3
+        produtos_limitados = produtos[:3]
+        produtos_join = " / ".join(produtos_limitados) + (" / ..." if mais_de_tres else "")
+
+        return {
+            "Número NF": nNF,
+            "CNPJ Emitente": formatar_documento(cnpj_emit),
+            "Nome Emitente": nome_emit,
+            "Data Emissão": dhEmi,
+            "Valor NF": vNF,
+            "Status NF": xMotivo,
+            "Produtos": produtos_join,
+            "Observações": ""
+        }
+    except Exception:
+        return None
+
+def extrair_linha(conteudo):
+    # Recebe os bytes de um XML e devolve a tupla na ordem do SCHEMA, ou None se não foi possível extrair
+    dados = extrair_dados_xml(conteudo)
+    return tuple(dados.values()) if dados else None
+
+def carregar(membros, cache=None, workers=None):
+    # Extrai os (nome, bytes) de `membros`; devolve o DataFrame e o total de XMLs lidos
+    dados_extraidos = AcumuladorColunar(SCHEMA)
+    total_xml = 0
+    with medicao.etapa("extrair XML"):
+        for lote in extrair_membros(extrair_linha, medicao.iterar("ler arquivos", membros), cache, workers):
+            dados_extraidos.estender([linha for _, linha in lote if linha])
+            total_xml += len(lote)
+    return dados_extraidos.para_dataframe(), total_xml
+
+@medicao.medida("preparar")
+def preparar(df):
+    # Ordena por emissão e deixa data e valor no formato da planilha
+    df['Valor NF'] = reais(df['Valor NF'].fillna(0))
+    df = df.sort_values(by="Data Emissão")
+    df['Data Emissão'] = df['Data Emissão'].dt.strftime('%d/%m/%Y')
+    return df
+
+def gerar_excel(df, destino):
+    gerar_relatorio(destino, df, "Notas_Fiscais", {"Valor NF": "R$ #,##0.00"})
@@ -0,0 +1,77 @@
+from ferramentas import medicao, nfe_xml
+from ferramentas.cache_extracao import extrair_membros
+from ferramentas.planilha import gerar_relatorio
+from ferramentas.colunar import AcumuladorColunar, TEXTO, CATEGORIA
+
+NS = {'ns': 'http://www.portalfiscal.inf.br/nfe'}
+SCHEMA = {'CNPJ': TEXTO, 'Nome da Empresa': TEXTO, 'Regime Tributário': CATEGORIA}
+# Identificação no cache de extração; incrementar a versão ao mudar o que extrair_regime devolve
+EXTRATOR = "regime.extrair_regime"
+VERSAO_EXTRATOR = 1
+_EMIT = nfe_xml.T + "emit"
+# A busca em toda a árvore cobre raízes fora do padrão (envelopes), como faz o ler_ate
+_EMIT_NA_NOTA = nfe_xml.elemento("nfe:NFe/nfe:infNFe/nfe:emit", "nfe:infNFe/nfe:emit", ".//nfe:emit")
+# Até este tamanho o parse completo (lxml) custa menos que o incremental; acima, o
+# custo cresceria com os itens e a leitura para no emitente
+_PARSE_COMPLETO_ATE = 8 * 1024
+
+def map_crt(crt):
+    return {
+        '1': 'Simples Nacional',
+        '2': 'Simples Nacional, excesso sublimite de receita bruta',
+        '3': 'Regime Normal',
+        '4': 'Microempreendedor Individual'
+    }.get(crt, 'Não identificado')
+
+def ler_emitente(conteudo):
+    """Devolve o elemento `emit` do XML (bytes), ou None.
+
+    Notas pequenas são lidas inteiras (com lxml é o caminho mais barato);
+    nas maiores a leitura para no fechamento de `emit`, que vem logo no
+    início da NF-e, e o custo por arquivo não cresce com o número de itens.
+    """
+    if nfe_xml.LXML and len(conteudo) <= _PARSE_COMPLETO_ATE:
+        return _EMIT_NA_NOTA(nfe_xml.ler(conteudo))
+    return nfe_xml.ler_ate(conteudo, _EMIT)
+
+def process_xml_file(conteudo, ns):
+    try:
+        emit = ler_emitente(conteudo)
+        if emit is None:
+            return None
+        cnpj = emit.find('ns:CNPJ', ns)
+        nome = emit.find('ns:xNome', ns)
+        crt = emit.find('ns:CRT', ns)
+        if cnpj is not None and nome is not None and crt is not None:
+            return {
+                'CNPJ': cnpj.text,
+                'Nome da Empresa': nome.text,
+                'Regime Tributário': map_crt(crt.text)
+            }
+    except:
+        return None
+
+def extrair_regime(conteudo):
+    # Resultado compacto por XML (bytes): uma tupla na ordem do SCHEMA, ou None se inválido
+    resultado = process_xml_file(conteudo, NS)
+    return tuple(resultado.values()) if resultado else None
+
+def carregar(membros, cache=None, workers=None):
+    # Extrai os (nome, bytes) de `membros`; devolve o DataFrame e o total de XMLs lidos
+    resultados_filtrados = AcumuladorColunar(SCHEMA)
+    total_lidos = 0
+    with medicao.etapa("extrair XML"):
+        for lote in extrair_membros(extrair_regime, medicao.iterar("ler arquivos", membros), cache, workers):
+            resultados_filtrados.estender([linha for _, linha in lote if linha])
+            total_lidos += len(lote)
+    return resultados_filtrados.para_dataframe(), total_lidos
+
+def formatar_saida(df):
+    # CNPJ formatado, como sai na planilha e nos demais formatos de exportação
+    return df.assign(CNPJ=df['CNPJ'].apply(nfe_xml.formatar_documento))
+
+def gerar_excel_formatado(df, caminho_saida, total_lidos, removidos, total_extraidos):
+    df = formatar_saida(df)
+    titulo = (f"Total de XMLs lidos: {total_lidos}  |  Duplicidades removidas: {removidos}  |  "
+              f"Total após exclusão: {total_extraidos}")
+    gerar_relatorio(caminho_saida, df, "Regime_Tributário", titulo=titulo, fator_largura=1.2, grade=False)
@@ -0,0 +1,113 @@
+import csv
+import datetime
+import io
+import os
+import openpyxl
+import pandas as pd
+from ferramentas import medicao
+
+# Linhas convertidas e gravadas por vez; a memória fica limitada a um lote
+LINHAS_POR_LOTE = 5_000
+
+
+def _cabecalho(valores):
+    # Mesmos nomes que o pd.read_excel daria: vazios viram "Unnamed: i" e repetidos ganham ".1", ".2"...
+    nomes = []
+    vistos = {}
+    for i, valor in enumerate(valores):
+        nome = f"Unnamed: {i}" if valor is None else str(valor)
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _celula(valor):
+    # Valor de uma célula como texto do CSV, sem a inferência de tipo por coluna do pandas
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if isinstance(valor, datetime.datetime):
+        return valor.strftime("%Y-%m-%d") if valor.time() == datetime.time() else str(valor)
+    return str(valor)
+
+
+def formatar_rendimento(valores):
+    """Formata um lote da coluna 'rendimento' com duas casas decimais ("1234.5" → "1,234,50").
+
+    Textos que não são número seguem como estão; vazios ficam vazios.
+    """
+    serie = pd.Series(valores, dtype=object)
+    texto = serie.map(_celula)
+    numeros = pd.to_numeric(texto.str.replace(",", ".", regex=False).str.strip(), errors="coerce")
+    validos = numeros.notna()
+    texto[validos] = numeros[validos].map("{:,.2f}".format).str.replace(".", ",", regex=False)
+    return texto.tolist()
+
+
+def _gravar_lote(destino, linhas, largura, col_rendimento):
+    if col_rendimento is not None:
+        formatados = formatar_rendimento([linha[col_rendimento] if len(linha) > col_rendimento else None for linha in linhas])
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator=os.linesep)
+    for i, linha in enumerate(linhas):
+        celulas = [_celula(valor) for valor in linha[:largura]]
+        celulas += [""] * (largura - len(celulas))
+        if col_rendimento is not None:
+            celulas[col_rendimento] = formatados[i]
+        escritor.writerow(celulas)
+    destino.write(buffer.getvalue().encode("utf-8"))
+
+
+def converter_planilha(arquivo, destino, linhas_por_lote=None, progresso=None):
+    """Converte a 1ª aba da planilha (upload, caminho ou buffer) em CSV UTF-8, gravado em `destino`.
+
+    A planilha é lida em modo somente leitura e o CSV é escrito lote a lote
+    no arquivo binário `destino`, com a coluna 'rendimento' formatada com
+    duas casas decimais. Devolve o número de linhas de dados gravadas.
+    `progresso(linhas)` é chamado a cada lote gravado.
+    """
+    with medicao.etapa("converter XLSX → CSV", arquivos=1, bytes=medicao.tamanho(arquivo)):
+        return _converter(arquivo, destino, linhas_por_lote or LINHAS_POR_LOTE, progresso)
+
+
+def _converter(arquivo, destino, linhas_por_lote, progresso):
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        # Sem dimensões fixas as linhas saem como estão no arquivo, sem uma varredura prévia da aba
+        ws.reset_dimensions()
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = _cabecalho(next(linhas, ()))
+        col_rendimento = next(
+            (i for i, nome in enumerate(cabecalho) if nome.strip().lower() == "rendimento"), None
+        )
+        _gravar_lote(destino, [cabecalho], len(cabecalho), None)
+
+        lote = []
+        vazias = 0
+        total = 0
+        for linha in linhas:
+            # Linhas vazias só são gravadas se vier uma linha com dados depois (o fim da aba é descartado)
+            if all(valor is None for valor in linha):
+                vazias += 1
+                continue
+            lote.extend([()] * vazias)
+            vazias = 0
+            lote.append(linha)
+            if len(lote) >= linhas_por_lote:
+                _gravar_lote(destino, lote, len(cabecalho), col_rendimento)
+                total += len(lote)
+                lote = []
+                if progresso:
+                    progresso(total)
+        if lote:
+            _gravar_lote(destino, lote, len(cabecalho), col_rendimento)
+            total += len(lote)
+    finally:
+        wb.close()
+    return total
@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Configuração padrão do processamento paralelo (pode ser ajustada por variável de ambiente)
+WORKERS = int(os.environ.get("FISCAI_WORKERS", "0")) or os.cpu_count() or 1
+TAMANHO_LOTE = int(os.environ.get("FISCAI_TAMANHO_LOTE", "500"))
+# O pool sobe a partir das threads de tarefa do servidor Streamlit; um fork de um
+# processo com várias threads pode herdar travas presas e deixar os filhos parados.
+# O forkserver (ou o spawn, onde não existe) cria os processos a partir de um processo limpo
+_CONTEXTO = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def lotes(itens, tamanho):
+    iterador = iter(itens)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def mapear_em_lotes(funcao, itens, workers=None, tamanho_lote=None):
+    """Aplica `funcao` a lotes de `itens` em um pool de processos.
+
+    `funcao` precisa ser definida no nível do módulo (para ser enviada aos
+    processos) e deve devolver um resultado compacto por lote. Os resultados
+    são entregues na mesma ordem dos lotes, e no máximo `2 * workers` lotes
+    ficam em memória ao mesmo tempo.
+    """
+    workers = workers or WORKERS
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    gerador = lotes(itens, tamanho_lote)
+
+    # Um único lote (ou um único worker) não compensa o custo de subir o pool
+    primeiros = list(islice(gerador, 2))
+    if workers <= 1 or len(primeiros) < 2:
+        for lote in primeiros:
+            yield funcao(lote)
+        for lote in gerador:
+            yield funcao(lote)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_CONTEXTO) as executor:
+        pendentes = deque(executor.submit(funcao, lote) for lote in primeiros)
+        for lote in gerador:
+            if len(pendentes) >= 2 * workers:
+                yield pendentes.popleft().result()
+            pendentes.append(executor.submit(funcao, lote))
+        while pendentes:
+            yield pendentes.popleft().result()
@@ -0,0 +1,166 @@
+import pandas as pd
+import xlsxwriter
+from ferramentas import medicao
+from ferramentas.colunar import blocos
+
+# Linhas convertidas por vez em gerar_relatorio
+_LINHAS_POR_BLOCO = 10_000
+# Limite de linhas de uma aba do Excel, cabeçalho incluído; acima dele os dados
+# continuam em <aba>_2, <aba>_3..., com o cabeçalho repetido
+LINHAS_POR_ABA = 1_048_576
+
+
+def larguras_colunas(df, fator=1, margem=2, ignorar_vazios=False):
+    # Maior texto entre o título e os valores de cada coluna, calculado de forma vetorizada;
+    # com `ignorar_vazios`, células vazias (NaN, "" e 0) não contam
+    larguras = []
+    for col in df.columns:
+        serie = df[col]
+        comprimentos = serie.astype(str).str.len()
+        if ignorar_vazios:
+            vazio = serie.isna() | serie.astype(object).isin(["", 0])
+            comprimentos = comprimentos.mask(vazio, 0)
+        maior = comprimentos.max() if len(df) else 0
+        maior = 0 if pd.isna(maior) else int(maior)
+        larguras.append(max(len(str(col)), maior) * fator + margem)
+    return larguras
+
+
+def valores_coluna(serie):
+    # Converte para tipos nativos do Python; NaN/None viram célula vazia
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def _por_coluna(formatos, colunas):
+    return [formatos(col) for col in colunas] if callable(formatos) else formatos
+
+
+def _trechos(formatos):
+    # Agrupa colunas vizinhas com o mesmo formato, para gravar cada linha com poucos write_row
+    trechos = []
+    inicio = 0
+    for i in range(1, len(formatos) + 1):
+        if i == len(formatos) or formatos[i] is not formatos[inicio]:
+            trechos.append((inicio, i, formatos[inicio]))
+            inicio = i
+    return trechos
+
+
+def nome_continuacao(nome, parte):
+    """Nome da `parte`-ésima aba de `nome` (a 1ª mantém o nome), dentro dos 31 caracteres do Excel."""
+    if parte == 1:
+        return nome
+    sufixo = f"_{parte}"
+    return nome[:31 - len(sufixo)] + sufixo
+
+
+def escrever_aba(wb, df, nome, formato_cabecalho, formatos, destaque=None, formatos_destaque=None):
+    """Escreve `df` em uma nova aba do workbook xlsxwriter `wb`, linha a linha.
+
+    `df` pode ser um DataFrame ou uma tabela em blocos (com `blocos()`),
+    gravada bloco a bloco; a escrita em ordem serve ao modo constant_memory.
+    `formatos` traz um formato por coluna, ou uma função nome da coluna →
+    formato, resolvidos uma única vez no primeiro bloco. `destaque` recebe
+    cada bloco e devolve a máscara booleana das linhas que usam
+    `formatos_destaque` (idem; ex.: notas canceladas). Acima de
+    `LINHAS_POR_ABA` as linhas seguem em novas abas (`nome_continuacao`).
+    Devolve a lista de abas criadas.
+    """
+    abas = []
+
+    def nova_aba():
+        ws = wb.add_worksheet(nome_continuacao(nome, len(abas) + 1))
+        ws.hide_gridlines(2)
+        abas.append(ws)
+        return ws
+
+    ws = nova_aba()
+    linha = 0
+    cabecalho = larguras = trechos = trechos_destaque = None
+    for bloco in blocos(df):
+        if larguras is None:
+            cabecalho = [str(col) for col in bloco.columns]
+            ws.write_row(0, 0, cabecalho, formato_cabecalho)
+            larguras = larguras_colunas(bloco)
+            trechos = _trechos(_por_coluna(formatos, bloco.columns))
+            if destaque is not None:
+                trechos_destaque = _trechos(_por_coluna(formatos_destaque, bloco.columns))
+        else:
+            larguras = [max(atual, nova) for atual, nova in zip(larguras, larguras_colunas(bloco))]
+        marcadas = destaque(bloco) if destaque is not None else None
+        for inicio_parte in range(0, len(bloco), _LINHAS_POR_BLOCO):
+            parte = bloco.iloc[inicio_parte:inicio_parte + _LINHAS_POR_BLOCO]
+            for i, valores in enumerate(zip(*(valores_coluna(parte[col]) for col in parte.columns)), inicio_parte):
+                if linha == LINHAS_POR_ABA - 1:
+                    ws = nova_aba()
+                    ws.write_row(0, 0, cabecalho, formato_cabecalho)
+                    linha = 0
+                linha += 1
+                for inicio, fim, formato in (trechos_destaque if marcadas is not None and marcadas[i] else trechos):
+                    ws.write_row(linha, inicio, valores[inicio:fim], formato)
+    for ws in abas:
+        for i, largura in enumerate(larguras or []):
+            ws.set_column(i, i, largura)
+    return abas
+
+
+@medicao.medida("gerar planilha")
+def gerar_relatorio(destino, df, nome, formatos_numero=None, titulo=None, fator_largura=1,
+                    congelar_cabecalho=False, grade=True):
+    """Grava `df` como relatório de uma aba em `destino` (caminho ou buffer), linha a linha.
+
+    Usa o xlsxwriter em modo constant_memory: cada linha vai para o disco
+    assim que é escrita, e os estilos (cabeçalho branco em negrito sobre
+    preto, dados centralizados) são criados uma única vez e compartilhados.
+    `formatos_numero` = {coluna: formato numérico do Excel}. Com `titulo`,
+    o texto fica mesclado em A1:C1 e a tabela começa na 3ª linha. As
+    larguras saem de `larguras_colunas`, multiplicadas por `fator_largura`.
+    Acima de `LINHAS_POR_ABA` os dados continuam em novas abas, cada uma
+    com título, cabeçalho e larguras.
+    """
+    formatos_numero = formatos_numero or {}
+    wb = xlsxwriter.Workbook(destino, {"constant_memory": True})
+    cabecalho = wb.add_format({"bold": True, "font_color": "#FFFFFF", "bg_color": "#000000",
+                               "align": "center", "valign": "vcenter"})
+    centro = wb.add_format({"align": "center", "valign": "vcenter"})
+    por_formato = {}
+    formatos = []
+    for col in df.columns:
+        num_format = formatos_numero.get(col)
+        if num_format and num_format not in por_formato:
+            por_formato[num_format] = wb.add_format({"align": "center", "valign": "vcenter", "num_format": num_format})
+        formatos.append(por_formato[num_format] if num_format else centro)
+    formato_titulo = wb.add_format({"bold": True, "align": "center"}) if titulo else None
+    larguras = larguras_colunas(df, fator_largura, ignorar_vazios=True)
+    nomes_colunas = [str(col) for col in df.columns]
+
+    def nova_aba(parte):
+        # Devolve a aba e a linha do cabeçalho
+        ws = wb.add_worksheet(nome_continuacao(nome, parte))
+        if not grade:
+            ws.hide_gridlines(2)
+        for i, largura in enumerate(larguras):
+            ws.set_column(i, i, largura)
+        linha = 0
+        if titulo:
+            ws.merge_range(0, 0, 0, 2, titulo, formato_titulo)
+            linha = 2
+        ws.write_row(linha, 0, nomes_colunas, cabecalho)
+        if congelar_cabecalho:
+            ws.freeze_panes(linha + 1, 0)
+        return ws, linha
+
+    parte = 1
+    ws, linha = nova_aba(parte)
+    # Converte os valores em blocos de linhas, para não duplicar o DataFrame inteiro em objetos Python
+    trechos = _trechos(formatos)
+    for bloco in range(0, len(df), _LINHAS_POR_BLOCO):
+        parte_df = df.iloc[bloco:bloco + _LINHAS_POR_BLOCO]
+        for valores in zip(*(valores_coluna(parte_df[col]) for col in df.columns)):
+            if linha == LINHAS_POR_ABA - 1:
+                parte += 1
+                ws, linha = nova_aba(parte)
+            linha += 1
+            for inicio, fim, formato in trechos:
+                ws.write_row(linha, inicio, valores[inicio:fim], formato)
+    wb.close()
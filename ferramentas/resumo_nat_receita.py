@@ -1,6 +1,37 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
+from ferramentas import tarefas
+from ferramentas.nucleo.nat_receita import (
+    formato_suportado, agregar_txt, combinar_totais, FILTROS, opcoes, filtrar, resumir, total_reais, gerar_excel
+)
+
+def processar_txt(tarefa, uploaded_files):
+    # Em segundo plano: os TXT são lidos em blocos e somados no cubo de totais, guardado na tarefa;
+    # trocar os filtros na página só reagrupa os totais. Avisos e erros por arquivo vão junto com o resultado.
+    totais = []
+    invalidas = 0
+    mensagens = []
+
+    for i, uploaded_file in enumerate(uploaded_files):
+        filename = uploaded_file.name.lower()
+        tarefa.avancar(i, len(uploaded_files), f"{i} de {len(uploaded_files)} arquivos — {filename}")
+
+        def progresso(linhas):
+            tarefa.avancar(texto=f"{i} de {len(uploaded_files)} arquivos — {filename}: {linhas} linhas")
+
+        try:
+            if formato_suportado(filename):
+                total_arquivo, invalidas_arquivo = agregar_txt(uploaded_file, progresso=progresso)
+                totais.append(total_arquivo)
+                invalidas += invalidas_arquivo
+            else:
+                mensagens.append(("warning", f"⚠️ Formato não suportado: {filename}"))
+
+        except Exception as e:
+            mensagens.append(("error", f"❌ Erro ao processar {filename}: {e}"))
+
+    cubo = combinar_totais(totais) if totais else None
+    return {"cubo": cubo, "invalidas": invalidas, "mensagens": mensagens}
 
 def app():
     st.title("📊 Leitor TXT | Natureza da Receita")
@@ -12,64 +43,35 @@ def app():
 
     uploaded_files = st.file_uploader("Envie um ou mais arquivos (.txt)", type=[".txt", ".html"], accept_multiple_files=True)
 
-    dfs = []
-
-    for uploaded_file in uploaded_files:
-        filename = uploaded_file.name.lower()
+    tarefa = tarefas.executar("nat-receita", uploaded_files, processar_txt)
+    df, invalidas = None, 0
+    if tarefa is not None:
+        for tipo, mensagem in tarefa.resultado["mensagens"]:
+            getattr(st, tipo)(mensagem)
+        df, invalidas = tarefa.resultado["cubo"], tarefa.resultado["invalidas"]
 
-        try:
-            if filename.endswith(".txt") or filename.endswith(".html"):
-                df_temp = pd.read_csv(uploaded_file, sep=",", header=None, quotechar='"', encoding="utf-8")
-                df_temp.columns = [
-                    "Documento", "Descrição", "Cod_Item", "Nat_Receita", "Cód. STB",
-                    "NCM", "CST_PIS", "CST_COFINS", "CFOP", "Qtde",
-                    "Valor_Produto", "Desconto", "Valor_Total"
-                ]
-                dfs.append(df_temp)
-            else:
-                st.warning(f"⚠️ Formato não suportado: {filename}")
-
-        except Exception as e:
-            st.error(f"❌ Erro ao processar {filename}: {e}")
-
-    if dfs:
-        df = pd.concat(dfs, ignore_index=True)
-
-        df["Valor_Total"] = (
-            df["Valor_Total"]
-            .astype(str)
-            .str.replace(".", "", regex=False)
-            .str.replace(",", ".", regex=False)
-            .str.replace("R$", "", regex=False)
-            .str.replace(" ", "", regex=False)
-        )
-        df["Valor_Total"] = pd.to_numeric(df["Valor_Total"], errors="coerce")
-
-        linhas_iniciais = len(df)
-        df = df[df["Valor_Total"].notnull()]
-        linhas_validas = len(df)
-
-        total_geral = df["Valor_Total"].sum().round(2)
+    if df is not None:
+        total_geral = total_reais(df)
         st.info(f"💰 Valor total geral (sem filtros): R$ {total_geral:,.2f}")
+        if invalidas:
+            st.caption(f"{invalidas} linha(s) sem Valor_Total válido foram desconsideradas.")
 
+        # `df` é o cubo de totais do upload: cada mudança de filtro reagrupa só as combinações
         st.subheader("🎯 Filtro CST_PIS")
-        cst_pis_unicos = sorted(df["CST_PIS"].astype(str).dropna().unique())
-        cst_pis_selecionado = st.multiselect("Selecione os CST_PIS desejados (deixe vazio para total geral)", cst_pis_unicos)
+        filtros = {
+            "CST_PIS": st.multiselect("Selecione os CST_PIS desejados (deixe vazio para total geral)", opcoes(df, "CST_PIS"))
+        }
+        with st.expander("Outros filtros (CST_COFINS, CFOP, capítulo NCM)"):
+            for coluna, rotulo in FILTROS.items():
+                if coluna not in filtros:
+                    filtros[coluna] = st.multiselect(rotulo, opcoes(df, coluna))
 
-        df_filtrado = df.copy()
-        if cst_pis_selecionado:
-            df_filtrado = df[df["CST_PIS"].astype(str).isin(cst_pis_selecionado)]
+        df_filtrado = filtrar(df, filtros)
 
-        total_filtrado = df_filtrado["Valor_Total"].sum().round(2)
+        total_filtrado = total_reais(df_filtrado)
         st.success(f"🔎 Total após filtro: R$ {total_filtrado:,.2f}")
 
-        resumo = (
-            df_filtrado.groupby("Nat_Receita")["Valor_Total"]
-            .sum()
-            .reset_index()
-            .rename(columns={"Nat_Receita": "Cód. Nat Receita", "Valor_Total": "Total Valor Contábil"})
-        )
-        resumo["Total Valor Contábil"] = resumo["Total Valor Contábil"].round(2)
+        resumo = resumir(df_filtrado)
 
         st.subheader("📋 Resumo agrupado por Código de Natureza")
         resumo_exibicao = resumo.copy()
@@ -78,11 +80,6 @@ def app():
         )
         st.dataframe(resumo_exibicao)
 
-        def gerar_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                df.to_excel(writer, index=False, sheet_name="Resumo")
-            return output.getvalue()
-
-        excel_bytes = gerar_excel(resumo)
-        st.download_button("📥 Baixar resumo como Excel", data=excel_bytes, file_name="resumo_nat_receita.xlsx")
+        output = BytesIO()
+        gerar_excel(resumo, output)
+        st.download_button("📥 Baixar resumo como Excel", data=output.getvalue(), file_name="resumo_nat_receita.xlsx")
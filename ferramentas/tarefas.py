@@ -0,0 +1,295 @@
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from ferramentas import medicao
+from ferramentas.fonte_zip import digest_uploads
+
+# Processamento das ferramentas em segundo plano, fora da thread do script do
+# Streamlit: a página acompanha o progresso, pode cancelar e, ao voltar (outra
+# ferramenta no menu ou recarga com o ?tarefa_<ferramenta>= da URL), encontra o
+# resultado guardado. FISCAI_TAREFAS limita quantas tarefas rodam ao mesmo tempo
+# e FISCAI_TAREFAS_MINUTOS quanto tempo um resultado fica guardado depois de pronto;
+# FISCAI_TAREFAS_MB limita a memória somada dos resultados guardados (os mais antigos
+# saem primeiro; o mais recente fica mesmo sozinho acima do limite).
+# O id na URL é um token aleatório longo, que só quem enviou o arquivo recebe; o
+# reaproveitamento pelo mesmo upload vale só dentro da sessão que o enviou.
+TAREFAS_SIMULTANEAS = int(os.environ.get("FISCAI_TAREFAS", "2"))
+RETENCAO_S = int(os.environ.get("FISCAI_TAREFAS_MINUTOS", "60")) * 60
+LIMITE_RESULTADOS_MB = int(os.environ.get("FISCAI_TAREFAS_MB", "512"))
+# Linhas das tabelas exibidas na página; o resultado completo vai só no arquivo de download
+LINHAS_PREVIA = 1000
+
+NA_FILA = "na fila"
+RODANDO = "rodando"
+CONCLUIDA = "concluída"
+CANCELADA = "cancelada"
+ERRO = "erro"
+
+
+def tamanho_resultado(valor):
+    """Bytes aproximados de um resultado: bytes/str, DataFrames (memória profunda) e dicts/listas deles."""
+    if isinstance(valor, (bytes, bytearray, str)):
+        return len(valor)
+    if hasattr(valor, "memory_usage"):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, dict):
+        return sum(tamanho_resultado(item) for item in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(tamanho_resultado(item) for item in valor)
+    return 0
+
+
+def previa(df):
+    """As primeiras `LINHAS_PREVIA` linhas de `df`, em cópia própria, para exibir na página."""
+    return df.head(LINHAS_PREVIA).copy()
+
+
+class Cancelada(BaseException):
+    """Interrompe a tarefa quando o usuário pede o cancelamento.
+
+    Como o KeyboardInterrupt, não é capturada por `except Exception` no
+    código das ferramentas.
+    """
+
+
+class Tarefa:
+    """Uma execução de `processar(tarefa, *args)` no pool de tarefas.
+
+    `processar` informa o andamento com `avancar`/`acompanhar`, que também
+    interrompem a tarefa (com `Cancelada`) se o cancelamento foi pedido, e
+    devolve o resultado que a página vai exibir (DataFrames, bytes da
+    planilha...). Não pode usar `st.*`: roda fora da sessão do Streamlit.
+    """
+
+    def __init__(self, ferramenta, chave, descricao, dono=None):
+        self.id = secrets.token_urlsafe(24)
+        self.dono = dono
+        self.ferramenta = ferramenta
+        self.chave = chave
+        self.descricao = descricao
+        self.estado = NA_FILA
+        self.feitos = 0
+        self.total = None
+        self.texto = "Na fila..."
+        self.resultado = None
+        self.tamanho = 0
+        self.erro = None
+        self.medicao = None
+        self.inicio = None
+        self.fim = None
+        self.future = None
+        self._cancelamento = threading.Event()
+
+    @property
+    def terminada(self):
+        return self.estado in (CONCLUIDA, CANCELADA, ERRO)
+
+    def cancelar(self):
+        self._cancelamento.set()
+        # Ainda na fila: sai sem rodar
+        if self.future is not None and self.future.cancel():
+            self._terminar(CANCELADA)
+
+    def avancar(self, feitos=None, total=None, texto=None):
+        """Atualiza o progresso; levanta `Cancelada` se o cancelamento foi pedido."""
+        if feitos is not None:
+            self.feitos = feitos
+        if total is not None:
+            self.total = total
+        if texto is not None:
+            self.texto = texto
+        if self._cancelamento.is_set():
+            raise Cancelada()
+
+    def acompanhar(self, itens, total, texto):
+        """Repassa os (nome, conteúdo) de `itens` avançando o progresso a cada um."""
+        self.avancar(0, total, f"{texto}: 0 de {total}")
+        for feitos, item in enumerate(itens, 1):
+            self.avancar(feitos, texto=f"{texto}: {feitos} de {total} — {os.path.basename(item[0])}")
+            yield item
+
+    def fracao(self):
+        if not self.total:
+            return 0.0
+        return min(self.feitos / self.total, 1.0)
+
+    def _terminar(self, estado):
+        self.estado = estado
+        self.fim = time.time()
+
+    def _executar(self, processar, args, medir):
+        if self._cancelamento.is_set():
+            self._terminar(CANCELADA)
+            return
+        self.estado = RODANDO
+        self.texto = "Processando..."
+        self.inicio = time.time()
+        with medicao.sessao(ativa=medir) as sessao:
+            try:
+                self.resultado = processar(self, *args)
+                self.tamanho = tamanho_resultado(self.resultado)
+                estado = CONCLUIDA
+            except Cancelada:
+                estado = CANCELADA
+            except Exception as e:
+                self.erro = f"{type(e).__name__}: {e}"
+                estado = ERRO
+        if sessao:
+            self.medicao = sessao.registros
+        self._terminar(estado)
+
+
+class GerenciadorTarefas:
+    """Pool de threads com as tarefas de todas as sessões, por id e por chave (ferramenta, digest do upload).
+
+    O mesmo upload reaproveita a tarefa já feita (ou em andamento) em vez
+    de processar de novo; tarefas terminadas saem depois de `RETENCAO_S`, ou
+    antes, da mais antiga para a mais nova, quando os resultados guardados
+    passam de `limite_mb`.
+    """
+
+    def __init__(self, simultaneas=None, retencao_s=None, limite_mb=None):
+        self.retencao_s = retencao_s or RETENCAO_S
+        self.limite_bytes = (limite_mb or LIMITE_RESULTADOS_MB) * 1024 * 1024
+        self._executor = ThreadPoolExecutor(max_workers=simultaneas or TAREFAS_SIMULTANEAS,
+                                            thread_name_prefix="fiscai-tarefa")
+        self._tarefas = {}
+        self._trava = threading.Lock()
+
+    def _podar(self):
+        limite = time.time() - self.retencao_s
+        for id_tarefa in [i for i, t in self._tarefas.items() if t.terminada and t.fim < limite]:
+            del self._tarefas[id_tarefa]
+        terminadas = sorted((t for t in self._tarefas.values() if t.terminada), key=lambda t: t.fim)
+        total = sum(t.tamanho for t in terminadas)
+        for tarefa in terminadas[:-1]:
+            if total <= self.limite_bytes:
+                break
+            total -= tarefa.tamanho
+            del self._tarefas[tarefa.id]
+
+    def submeter(self, ferramenta, chave, descricao, processar, *args, medir=False, dono=None):
+        tarefa = Tarefa(ferramenta, chave, descricao, dono)
+        with self._trava:
+            self._podar()
+            self._tarefas[tarefa.id] = tarefa
+            tarefa.future = self._executor.submit(tarefa._executar, processar, args, medir)
+        return tarefa
+
+    def obter(self, id_tarefa):
+        with self._trava:
+            self._podar()
+            return self._tarefas.get(id_tarefa)
+
+    def buscar(self, chave, dono=None):
+        """A tarefa mais recente com `chave` submetida por `dono` (a sessão), em qualquer estado (ou None)."""
+        with self._trava:
+            self._podar()
+            encontradas = [t for t in self._tarefas.values() if t.chave == chave and t.dono == dono]
+        return encontradas[-1] if encontradas else None
+
+
+@st.cache_resource
+def gerenciador():
+    # Um único pool por processo do servidor, compartilhado pelas sessões
+    return GerenciadorTarefas()
+
+
+def copiar_upload(upload):
+    # Cópia própria do conteúdo: a tarefa segue mesmo se o upload sair da tela, sem disputar a posição do buffer
+    copia = BytesIO(upload.getvalue())
+    copia.name = upload.name
+    return copia
+
+
+@st.fragment(run_every=1)
+def _acompanhar(id_tarefa):
+    # Só este trecho é refeito a cada segundo; ao terminar, a página toda roda de novo para exibir o resultado
+    tarefa = gerenciador().obter(id_tarefa)
+    if tarefa is None or tarefa.terminada:
+        st.rerun()
+    st.progress(tarefa.fracao(), text=f"⏳ {tarefa.texto}")
+    if st.button("⏹️ Cancelar", key=f"cancelar_{id_tarefa}"):
+        tarefa.cancelar()
+        st.rerun()
+
+
+def _sessao():
+    # Id da sessão do Streamlit que está rodando o script (None fora dele)
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto else None
+
+
+def _submeter(ferramenta, chave, uploads, processar, args):
+    varios = isinstance(uploads, (list, tuple))
+    lista = uploads if varios else [uploads]
+    copias = [copiar_upload(upload) for upload in lista]
+    return gerenciador().submeter(
+        ferramenta, chave, ", ".join(upload.name for upload in lista), processar,
+        copias if varios else copias[0], *args, medir=medicao.ativa(), dono=_sessao(),
+    )
+
+
+def _esquecer(chave_sessao):
+    st.session_state.pop(chave_sessao, None)
+    st.query_params.pop(chave_sessao, None)
+
+
+def executar(ferramenta, uploads, processar, *args):
+    """Processa `uploads` em segundo plano com `processar(tarefa, copia_dos_uploads, *args)`.
+
+    Exibe o progresso (com botão de cancelar) enquanto a tarefa roda e
+    devolve a tarefa concluída, com o `resultado`, ou None enquanto não há
+    resultado para mostrar. Sem upload na tela, recupera a última tarefa da
+    ferramenta nesta sessão (ou a indicada na URL). Os `args` (ex.: o
+    formato de saída) entram na chave: mudá-los processa de novo.
+    """
+    chave_sessao = f"tarefa_{ferramenta}"
+    if uploads:
+        chave = (ferramenta, digest_uploads(uploads), *args)
+        tarefa = gerenciador().buscar(chave, _sessao()) or _submeter(ferramenta, chave, uploads, processar, args)
+    else:
+        id_tarefa = st.session_state.get(chave_sessao) or st.query_params.get(chave_sessao)
+        tarefa = gerenciador().obter(id_tarefa) if id_tarefa else None
+        if tarefa is not None and tarefa.ferramenta != ferramenta:
+            tarefa = None
+        if tarefa is None:
+            if id_tarefa:
+                _esquecer(chave_sessao)
+            return None
+        st.info(f"📂 Resultado do último envio: {tarefa.descricao}")
+        if st.button("🗑️ Descartar resultado", key=f"descartar_{ferramenta}"):
+            _esquecer(chave_sessao)
+            st.rerun()
+
+    st.session_state[chave_sessao] = tarefa.id
+    st.query_params[chave_sessao] = tarefa.id
+
+    if not tarefa.terminada:
+        _acompanhar(tarefa.id)
+        return None
+    if tarefa.estado == CONCLUIDA:
+        # As etapas medidas na tarefa entram uma vez no painel de desempenho desta sessão
+        incorporadas = st.session_state.setdefault("medicoes_incorporadas", set())
+        if tarefa.medicao and tarefa.id not in incorporadas and medicao.ativa():
+            medicao.incorporar(f"tarefa {ferramenta}", tarefa.medicao, tarefa.fim - tarefa.inicio)
+            incorporadas.add(tarefa.id)
+        return tarefa
+
+    if tarefa.estado == CANCELADA:
+        st.warning("⏹️ Processamento cancelado.")
+    else:
+        st.error(f"❌ Erro no processamento: {tarefa.erro}")
+    if uploads and st.button("🔄 Processar novamente", key=f"reprocessar_{ferramenta}"):
+        nova = _submeter(ferramenta, tarefa.chave, uploads, processar, args)
+        st.session_state[chave_sessao] = nova.id
+        st.query_params[chave_sessao] = nova.id
+        st.rerun()
+    return None
@@ -0,0 +1,37 @@
+"""Gera o banner otimizado da página inicial em static/ (rodar no build da imagem).
+
+O PNG original (fiscai_banner.png, ~2,3 MB) vira um WebP com transparência
+de ~200 KB, servido pelo Streamlit como arquivo estático
+(server.enableStaticServing) e guardado em cache pelo navegador, em vez de
+ser decodificado e reenviado em base64 a cada execução da página.
+
+Uso: python scripts/gerar_banner.py [--qualidade 85]
+"""
+
+import argparse
+import os
+
+from PIL import Image
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORIGEM = os.path.join(RAIZ, "fiscai_banner.png")
+DESTINO = os.path.join(RAIZ, "static", "fiscai_banner.webp")
+
+
+def gerar(origem=ORIGEM, destino=DESTINO, qualidade=85):
+    with Image.open(origem) as imagem:
+        imagem.save(destino, "WEBP", quality=qualidade, method=6)
+    return os.path.getsize(destino)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera static/fiscai_banner.webp a partir de fiscai_banner.png.")
+    parser.add_argument("--qualidade", type=int, default=85, help="qualidade do WebP (0 a 100)")
+    args = parser.parse_args(argv)
+    tamanho = gerar(qualidade=args.qualidade)
+    print(f"Gravado: {os.path.relpath(DESTINO, RAIZ)} ({tamanho / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
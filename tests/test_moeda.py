@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from ferramentas.moeda import centavos, formatar, reais
+
+
+def test_texto_do_xml_em_centavos():
+    resultado = centavos(pd.Series(["1234.56", "12.5", "0", "-3.10"]))
+    assert str(resultado.dtype) == "Int64"
+    assert resultado.tolist() == [123456, 1250, 0, -310]
+
+
+def test_texto_brasileiro_com_decimal_virgula():
+    resultado = centavos(pd.Series(["R$ 1.234,56", "1.234,56", " 12,3 ", "1.000.000,01"]), decimal=",")
+    assert resultado.tolist() == [123456, 123456, 1230, 100000001]
+
+
+def test_valor_invalido_vira_na():
+    resultado = centavos(pd.Series(["abc", "", None, "1,2,3", "10.00"]))
+    assert resultado.isna().tolist() == [True, True, True, True, False]
+    assert centavos(pd.Series(["R$ -", "12,34"]), decimal=",").isna().tolist() == [True, False]
+
+
+def test_exato_ate_duas_casas_abaixo_de_10_13_reais():
+    # O limite citado para o parse via float: duas casas e menos de 10^13 reais (10^15 centavos)
+    gerador = np.random.default_rng(0)
+    esperados = np.concatenate([gerador.integers(0, 10**15, 50_000), [10**15 - 1, 1, 29, 57, 115, 1005]])
+    textos = pd.Series([f"{valor // 100}.{valor % 100:02d}" for valor in esperados])
+    assert (centavos(textos).to_numpy(dtype="int64") == esperados).all()
+
+
+def test_reais_para_exibicao():
+    assert reais(pd.Series(pd.array([123456, None], dtype="Int64"))).tolist()[0] == 1234.56
+    assert np.isnan(reais(pd.Series(pd.array([None], dtype="Int64"))).iloc[0])
+
+
+def test_formatar():
+    assert formatar(123456) == "R$ 1.234,56"
+    assert formatar(123456789) == "R$ 1.234.567,89"
+    assert formatar(0) == "R$ 0,00"
+    assert formatar(pd.NA) == ""
+
+
+def test_formatar_negativo():
+    assert formatar(-123456) == "R$ -1.234,56"
+    assert formatar(-5) == "R$ -0,05"
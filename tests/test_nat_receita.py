@@ -0,0 +1,61 @@
+from io import BytesIO
+
+import pandas as pd
+
+from ferramentas.nucleo.nat_receita import COLUNAS, agregar_txt, combinar_totais, filtrar, resumir, total_reais
+
+TXT = """\
+"1","Prod A","10","403","x","62162500","1","1","5102","1","0","0","R$ 30.939,38"
+"1","Prod B","11","101","x","29545615","50","50","5102","1","0","0","R$ 52.637,70"
+"2","Prod C","12","101","x","83845836","50","50","5405","1","0","0","R$ 0,01"
+"2","Prod D","13","403","x","62169900","1","1","5102","1","0","0","R$ 1.000.000,99"
+"3","Prod E","14","999","x","10000000","6","6","5102","1","0","0","sem valor"
+"3","Prod F","15","101","x","29540000","1","50","6102","1","0","0","R$ 17,30"
+"4","Prod G","16","999","x","10000000","6","6","5102","1","0","0","R$ 2,50"
+"""
+
+
+def _resumo_direto(filtro_cst_pis=None):
+    # Referência: o TXT inteiro, valores em centavos a partir do texto e groupby direto por Nat_Receita
+    df = pd.read_csv(BytesIO(TXT.encode()), header=None, names=COLUNAS, dtype=str)
+    texto = df["Valor_Total"].str.replace("R$ ", "", regex=False).str.replace(".", "", regex=False)
+    valido = texto.str.fullmatch(r"\d+,\d{2}")
+    df = df[valido].assign(Valor_Total=texto[valido].str.replace(",", "", regex=False).astype("int64"))
+    if filtro_cst_pis:
+        df = df[df["CST_PIS"].isin(filtro_cst_pis)]
+    resumo = df.groupby(df["Nat_Receita"].astype("int64"))["Valor_Total"].sum()
+    return {int(nat): int(total) for nat, total in resumo.items()}
+
+
+def _resumo(cubo, filtros):
+    resumo = resumir(filtrar(cubo, filtros))
+    return {int(nat): round(total * 100) for nat, total in
+            zip(resumo["Cód. Nat Receita"], resumo["Total Valor Contábil"])}
+
+
+def _cubo(linhas=None):
+    totais, invalidas = agregar_txt(BytesIO(TXT.encode()), linhas)
+    return combinar_totais([totais]), invalidas
+
+
+def test_sem_filtro_igual_ao_groupby_direto():
+    cubo, invalidas = _cubo()
+    assert invalidas == 1
+    assert _resumo(cubo, {}) == _resumo_direto()
+    assert _resumo(cubo, {"CST_PIS": [], "CFOP": []}) == _resumo_direto()
+    assert round(total_reais(cubo) * 100) == sum(_resumo_direto().values())
+
+
+def test_leitura_em_blocos_da_o_mesmo_cubo():
+    # Blocos de 2 linhas: os totais parciais somados batem com a leitura de uma vez
+    assert _resumo(_cubo(linhas=2)[0], {}) == _resumo_direto()
+
+
+def test_varios_arquivos_somam_no_mesmo_cubo():
+    totais = [agregar_txt(BytesIO(TXT.encode()))[0] for _ in range(2)]
+    assert _resumo(combinar_totais(totais), {}) == {nat: 2 * total for nat, total in _resumo_direto().items()}
+
+
+def test_filtro_cst_pis():
+    cubo, _ = _cubo()
+    assert _resumo(cubo, {"CST_PIS": ["50"]}) == _resumo_direto(["50"])
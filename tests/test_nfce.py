@@ -0,0 +1,53 @@
+import pandas as pd
+
+from ferramentas.nucleo.nfce import detectar_quebras
+
+COLUNAS = ["Série", "Número_Anterior", "Número_Atual", "Primeiro_Faltante", "Último_Faltante", "Quantidade", "Ocorrência"]
+
+
+def _quebras(series, numeros):
+    return detectar_quebras(pd.Series(series, dtype=object), pd.Series(numeros, dtype="Int64"))
+
+
+def _linhas(df):
+    # Linhas como tuplas, com <NA> virando None para comparar
+    return [tuple(None if pd.isna(valor) else valor for valor in linha) for linha in df.itertuples(index=False)]
+
+
+def test_entrada_vazia():
+    resultado = _quebras([], [])
+    assert list(resultado.columns) == COLUNAS
+    assert resultado.empty
+
+
+def test_sequencia_sem_quebra():
+    assert _quebras(["1"] * 4, [1, 2, 3, 4]).empty
+
+
+def test_quebra_vira_intervalo_faltante():
+    assert _linhas(_quebras(["1"] * 3, [1, 2, 7])) == [("1", 2, 7, 3, 6, 4, "Quebra")]
+
+
+def test_numero_nulo_e_ignorado():
+    assert _linhas(_quebras(["1"] * 4, [1, None, 2, 4])) == [("1", 2, 4, 3, 3, 1, "Quebra")]
+
+
+def test_numero_repetido_tres_vezes_e_uma_duplicidade():
+    assert _linhas(_quebras(["1"] * 4, [5, 5, 5, 6])) == [("1", 5, 5, None, None, 3, "Duplicidade")]
+
+
+def test_duplicidade_antes_da_quebra_no_mesmo_numero():
+    assert _linhas(_quebras(["1"] * 5, [1, 2, 2, 2, 5])) == [
+        ("1", 2, 2, None, None, 3, "Duplicidade"),
+        ("1", 2, 5, 3, 4, 2, "Quebra"),
+    ]
+
+
+def test_series_sao_independentes():
+    # Fora de ordem e com números que se repetem entre séries: nada de quebra ou duplicidade entre elas
+    resultado = _quebras(["2", "1", "2", "1", "2"], [10, 3, 13, 1, 11])
+    assert _linhas(resultado) == [
+        ("1", 1, 3, 2, 2, 1, "Quebra"),
+        ("2", 11, 13, 12, 12, 1, "Quebra"),
+    ]
+    assert _quebras(["1", "2"], [5, 5]).empty
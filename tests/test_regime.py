@@ -0,0 +1,23 @@
+from ferramentas.nucleo import regime
+
+_NOTA = (
+    '<NFe xmlns="http://www.portalfiscal.inf.br/nfe"><infNFe Id="NFe1">'
+    "<ide><nNF>1</nNF></ide>"
+    "<emit><CNPJ>12345678000195</CNPJ><xNome>Empresa Teste</xNome><CRT>1</CRT></emit>"
+    "</infNFe></NFe>"
+)
+
+
+def test_nota_pequena_com_raiz_fora_do_padrao():
+    # Envelope em volta da NFe: pequena, vai pelo parse completo e precisa achar o emit como o ler_ate acha
+    conteudo = f"<lote><envelope>{_NOTA}</envelope></lote>".encode()
+    assert len(conteudo) <= regime._PARSE_COMPLETO_ATE
+    assert regime.extrair_regime(conteudo) == ("12345678000195", "Empresa Teste", "Simples Nacional")
+
+
+def test_mesmo_resultado_acima_do_limite():
+    # A mesma nota, engordada acima do limite, vai pela leitura incremental e dá o mesmo resultado
+    enchimento = "<!--" + "x" * regime._PARSE_COMPLETO_ATE + "-->"
+    pequeno = f"<lote><envelope>{_NOTA}</envelope></lote>".encode()
+    grande = f"<lote><envelope>{_NOTA}</envelope>{enchimento}</lote>".encode()
+    assert regime.extrair_regime(grande) == regime.extrair_regime(pequeno)
@@ -0,0 +1,39 @@
+import time
+
+from ferramentas.tarefas import GerenciadorTarefas
+
+
+def _esperar(tarefa):
+    while not tarefa.terminada:
+        time.sleep(0.01)
+    return tarefa
+
+
+def test_resultados_antigos_saem_acima_do_limite():
+    gerenciador = GerenciadorTarefas(simultaneas=1, limite_mb=1)
+    processar = lambda tarefa, tamanho: {"arquivo": b"x" * tamanho}
+    antiga = _esperar(gerenciador.submeter("t", "a", "a", processar, 700 * 1024))
+    nova = _esperar(gerenciador.submeter("t", "b", "b", processar, 700 * 1024))
+    assert gerenciador.obter(antiga.id) is None
+    assert gerenciador.obter(nova.id) is nova
+
+
+def test_mais_recente_fica_mesmo_acima_do_limite():
+    gerenciador = GerenciadorTarefas(simultaneas=1, limite_mb=1)
+    tarefa = _esperar(gerenciador.submeter("t", "a", "a", lambda tarefa: {"arquivo": b"x" * 2 * 1024 * 1024}))
+    assert gerenciador.obter(tarefa.id) is tarefa
+    assert tarefa.tamanho == 2 * 1024 * 1024
+
+
+def test_mesmo_upload_so_reaproveita_na_mesma_sessao():
+    gerenciador = GerenciadorTarefas(simultaneas=1)
+    tarefa = _esperar(gerenciador.submeter("t", ("t", "digest"), "a", lambda tarefa: {}, dono="sessao-a"))
+    assert gerenciador.buscar(("t", "digest"), "sessao-a") is tarefa
+    assert gerenciador.buscar(("t", "digest"), "sessao-b") is None
+
+
+def test_id_da_tarefa_nao_e_adivinhavel():
+    gerenciador = GerenciadorTarefas(simultaneas=1)
+    tarefa = _esperar(gerenciador.submeter("t", "a", "a", lambda tarefa: {}))
+    assert len(tarefa.id) >= 32
+    assert gerenciador.obter(tarefa.id[:12]) is None